@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AuthenticationConfig(AppConfig):
     name = 'authentication'
+
+    def ready(self):
+        import authentication.checks  # noqa: F401
+        import authentication.signals  # noqa: F401
@@ -0,0 +1,108 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from authentication.tokens import ACCESS, is_signed_token, \
+    legacy_token_expired, read_token, token_user
+
+
+class TokenCache:
+    """ Thread safe LRU cache of token keys to users, with a TTL """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Return the cached (user, token) of a key, or None """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            credentials, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return credentials
+
+    def set(self, key, credentials):
+        """ Cache the (user, token) of a key, evicting the oldest entry """
+        with self._lock:
+            self._entries[key] = (credentials, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None, user_id=None):
+        """ Drop a token key, or every token of a user """
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            if user_id is not None:
+                entries = list(self._entries.items())
+                for cached_key, ((user, token), expires_at) in entries:
+                    if user.pk == user_id:
+                        del self._entries[cached_key]
+
+    def clear(self):
+        """ Drop every entry """
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    getattr(settings, 'TOKEN_CACHE_TTL', 60)
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """ Token authentication keeping token lookups in a process cache
+
+    Signals drop entries when a token is deleted or its user changes;
+    other processes see such changes once their entries expire. Tokens
+    older than LEGACY_TOKEN_MAX_AGE_DAYS are refused, when it is set.
+    """
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+
+        user, token = credentials
+        if legacy_token_expired(token):
+            token_cache.invalidate(key)
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        return copy.copy(user), token
+
+
+class SignedTokenAuthentication(CachedTokenAuthentication):
+    """ Token authentication verifying signed tokens without the database
+
+    Legacy tokens are still accepted through the cached lookup.
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_signed_token(key):
+            return super().authenticate_credentials(key)
+
+        try:
+            claims = read_token(key, ACCESS)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        return token_user(claims), claims
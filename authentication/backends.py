@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from authentication import hashing
+
+
+class HashingPoolBackend(ModelBackend):
+    """ ModelBackend checking passwords in the hashing process pool
+
+    Raises HashingUnavailable, a 503, when the hashing queue is full.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """ Return the active user matching the credentials, if any
+
+        Unknown users still pay for a hash so they can't be told apart
+        by time, as with ModelBackend.
+        """
+        model = get_user_model()
+        if username is None:
+            username = kwargs.get(model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = model._default_manager.get_by_natural_key(username)
+        except model.DoesNotExist:
+            hashing.make_password(password)
+            return None
+
+        if hashing.check_password(user, password) and \
+                self.user_can_authenticate(user):
+            return user
+
+        return None
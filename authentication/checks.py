@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+# Cache backends whose entries stay in one process, or are not kept
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def signed_tokens_cache_check(app_configs, **kwargs):
+    """ Refuse signed tokens when their revocations stay in one process """
+    backend = settings.CACHES['default']['BACKEND']
+    if getattr(settings, 'AUTH_TOKEN_MODE', 'legacy') != 'signed' or \
+            backend not in LOCAL_CACHE_BACKENDS:
+        return []
+
+    return [Error(
+        'AUTH_TOKEN_MODE=signed needs a cache shared by every worker.',
+        hint='Token revocations live in the default cache. Set '
+             'CACHE_BACKEND to a shared backend such as Memcached.',
+        obj=backend,
+        id='authentication.E001',
+    )]
@@ -0,0 +1,188 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+WORKERS = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+QUEUE_SIZE = getattr(settings, 'PASSWORD_HASH_QUEUE_SIZE', 32)
+RETRY_AFTER = getattr(settings, 'PASSWORD_HASH_RETRY_AFTER', 1)
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(QUEUE_SIZE)
+
+
+class HashingUnavailable(APIException):
+    """ Raised when the password hashing queue is full """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many sign ins right now, try again shortly')
+    default_code = 'hashing_unavailable'
+
+    def __init__(self, detail=None, code=None, wait=RETRY_AFTER):
+        super().__init__(detail, code)
+        # Picked up by the DRF exception handler as the Retry-After header
+        self.wait = wait
+
+
+class HashingMetrics:
+    """ Thread-safe counters of the password hashing queue """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.in_flight = 0
+            self.completed = 0
+            self.rejected = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, latency):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': WORKERS,
+                'queue_size': QUEUE_SIZE,
+                'queue_depth': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'latency_ms_avg': (
+                    self.total_latency / self.completed * 1000
+                    if self.completed else 0.0
+                ),
+                'latency_ms_max': self.max_latency * 1000,
+            }
+
+
+metrics = HashingMetrics()
+
+
+def hashing_stats():
+    """ Return the queue depth and latency of password hashing """
+    return metrics.stats()
+
+
+def _init_worker():
+    """ Set Django up in worker processes started without fork """
+    if not apps.ready:
+        django.setup()
+
+
+def _get_executor():
+    """ Return the shared hashing process pool, starting it if needed """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                initializer=_init_worker
+            )
+
+    return _executor
+
+
+def start_workers():
+    """ Start the worker processes ahead of the first hash """
+    if WORKERS:
+        executor = _get_executor()
+        for future in [executor.submit(int) for _ in range(WORKERS)]:
+            future.result()
+
+
+def _reset_executor(broken):
+    """ Drop a broken process pool so the next call starts a new one """
+    global _executor
+
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+def _make_password(password):
+    return hashers.make_password(password)
+
+
+def _check_password(password, encoded):
+    """ Check a password, returning its upgraded hash when one is due """
+    upgraded = []
+    valid = hashers.check_password(
+        password,
+        encoded,
+        setter=lambda raw: upgraded.append(hashers.make_password(raw))
+    )
+
+    return valid, upgraded[0] if upgraded else None
+
+
+def _run(func, *args):
+    """ Run a hashing function in the pool, bounded by the queue size
+
+    Raises HashingUnavailable straight away when the queue is full
+    instead of piling more requests up behind it. With no workers
+    configured, the function runs on the calling thread.
+    """
+    if not _slots.acquire(blocking=False):
+        metrics.reject()
+        raise HashingUnavailable()
+
+    metrics.started()
+    started = time.monotonic()
+    try:
+        if not WORKERS:
+            return func(*args)
+
+        executor = _get_executor()
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            raise HashingUnavailable()
+    finally:
+        metrics.finished(time.monotonic() - started)
+        _slots.release()
+
+
+def make_password(password):
+    """ Return the hash of a password, computed off the request worker """
+    return _run(_make_password, password)
+
+
+def check_password(user, password):
+    """ Check a user's password off the request worker
+
+    A hash due for an upgrade to the current hasher is saved back on
+    the user, as Django's own check does.
+    """
+    valid, upgraded = _run(_check_password, password, user.password)
+    if upgraded:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+
+    return valid
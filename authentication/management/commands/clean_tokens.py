@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    """Django command to delete expired legacy auth tokens"""
+    help = 'Delete legacy auth tokens older than the allowed age'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'LEGACY_TOKEN_MAX_AGE_DAYS', None),
+            help='Age in days after which legacy tokens expire, '
+                 'LEGACY_TOKEN_MAX_AGE_DAYS by default'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tokens deleted per query'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options['days'] is None:
+            raise CommandError(
+                'Legacy tokens do not expire: pass --days or set '
+                'LEGACY_TOKEN_MAX_AGE_DAYS'
+            )
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = Token.objects.filter(created__lt=cutoff)
+
+        deleted = 0
+        while True:
+            keys = list(
+                expired.values_list('key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted += Token.objects.filter(key__in=keys).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} expired tokens')
+        )
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from authentication.authentication import token_cache
+from authentication.tokens import revoke_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """ Forget a deleted token """
+    token_cache.invalidate(key=instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """ Forget the tokens of a changed or deleted user """
+    token_cache.invalidate(user_id=instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_credentials_changed(sender, instance, created, **kwargs):
+    """ Revoke the signed tokens of a deactivated user or new password """
+    if not created and (
+        not instance.is_active or instance._password is not None
+    ):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    """ Revoke the signed tokens of a deleted user """
+    revoke_user_tokens(instance.pk)
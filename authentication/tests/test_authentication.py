@@ -0,0 +1,94 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from authentication.authentication import CachedTokenAuthentication, \
+    token_cache
+from authentication.checks import signed_tokens_cache_check
+
+
+@pytest.fixture
+def token(db):
+    token_cache.clear()
+    user = get_user_model().objects.create_user('test@test.com', 'test123')
+    yield Token.objects.create(user=user)
+    token_cache.clear()
+
+
+def test_token_lookup_cached(token):
+    """ Test a token is only looked up in the database once """
+    auth = CachedTokenAuthentication()
+    auth.authenticate_credentials(token.key)
+
+    with CaptureQueriesContext(connection) as ctx:
+        user, cached_token = auth.authenticate_credentials(token.key)
+
+    assert len(ctx.captured_queries) == 0
+    assert user == token.user
+    assert cached_token == token
+
+
+def test_deleted_token_rejected(token):
+    """ Test a deleted token is dropped from the cache """
+    auth = CachedTokenAuthentication()
+    auth.authenticate_credentials(token.key)
+    token.delete()
+
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate_credentials(token.key)
+
+
+def test_deactivated_user_rejected(token):
+    """ Test the tokens of a deactivated user are dropped from the cache """
+    auth = CachedTokenAuthentication()
+    auth.authenticate_credentials(token.key)
+    token.user.is_active = False
+    token.user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate_credentials(token.key)
+
+
+def test_expired_token_rejected(token, settings):
+    """ Test a token past the legacy token age is rejected """
+    settings.LEGACY_TOKEN_MAX_AGE_DAYS = 30
+    auth = CachedTokenAuthentication()
+    token.created = timezone.now() - timedelta(days=31)
+    token.save()
+
+    with pytest.raises(AuthenticationFailed):
+        auth.authenticate_credentials(token.key)
+    assert token_cache.get(token.key) is None
+
+
+def test_old_token_accepted_by_default(token):
+    """ Test legacy tokens don't expire unless an age is set """
+    token.created = timezone.now() - timedelta(days=365)
+    token.save()
+
+    user, _ = CachedTokenAuthentication().authenticate_credentials(token.key)
+
+    assert user == token.user
+
+
+def test_signed_tokens_need_shared_cache(settings):
+    """ Test signed tokens are refused with a process local cache """
+    settings.AUTH_TOKEN_MODE = 'signed'
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+    }}
+
+    errors = signed_tokens_cache_check(None)
+
+    assert [error.id for error in errors] == ['authentication.E001']
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': 'cache:11211',
+    }}
+    assert signed_tokens_cache_check(None) == []
@@ -1,21 +1,64 @@
 import pytest
+from datetime import timedelta
 from unittest.mock import patch
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
 def test_wait_for_db_ready():
     """ Test waiting for db when db is available """
     with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-        gi.return_value = True
         call_command('wait_for_db')
 
         assert gi.call_count == 1
+        gi.return_value.ensure_connection.assert_called_once()
 
 @patch('time.sleep', return_value=None)
 def test_wait_for_db(mock__ts):
     """ Test wating for db """
     with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-        gi.side_effect = [OperationalError] * 5 + [True]
+        gi.return_value.ensure_connection.side_effect = \
+            [OperationalError] * 5 + [None]
         call_command('wait_for_db')
 
         assert gi.call_count == 6
+        assert [c.args[0] for c in mock__ts.call_args_list] == \
+            [0.1, 0.2, 0.4, 0.8, 1.6]
+
+
+@patch('time.sleep', return_value=None)
+def test_wait_for_db_deadline(mock__ts):
+    """ Test waiting for db gives up once the timeout has passed """
+    with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+        gi.return_value.ensure_connection.side_effect = OperationalError
+        with patch('time.monotonic', side_effect=[0, 0, 0, 20]):
+            with pytest.raises(CommandError):
+                call_command('wait_for_db', timeout=10)
+
+        assert mock__ts.call_count == 2
+
+
+@pytest.mark.django_db
+def test_clean_tokens():
+    """ Test legacy tokens older than the max age are deleted """
+    old_user = get_user_model().objects.create_user('old@test.com', 'pass')
+    new_user = get_user_model().objects.create_user('new@test.com', 'pass')
+    old_token = Token.objects.create(user=old_user)
+    new_token = Token.objects.create(user=new_user)
+    Token.objects.filter(key=old_token.key).update(
+        created=timezone.now() - timedelta(days=31)
+    )
+
+    call_command('clean_tokens', days=30)
+
+    assert list(Token.objects.all()) == [new_token]
+
+
+@pytest.mark.django_db
+def test_clean_tokens_needs_days():
+    """ Test tokens are kept unless an age is given or configured """
+    with pytest.raises(CommandError):
+        call_command('clean_tokens')
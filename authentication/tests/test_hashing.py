@@ -0,0 +1,63 @@
+import pytest
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+
+from authentication import hashing
+
+
+@pytest.fixture
+def metrics():
+    hashing.metrics.reset()
+    yield hashing.metrics
+    hashing.metrics.reset()
+
+
+@pytest.mark.django_db
+def test_check_password_in_pool(metrics):
+    """ Test passwords are hashed and checked in the pool """
+    user = get_user_model().objects.create(
+        email='test@test.com',
+        password=hashing.make_password('test123')
+    )
+
+    assert hashing.check_password(user, 'test123')
+    assert not hashing.check_password(user, 'wrong')
+    stats = hashing.hashing_stats()
+    assert stats['completed'] == 3
+    assert stats['queue_depth'] == 0
+
+
+@pytest.mark.django_db
+def test_check_password_upgrades_hash(metrics):
+    """ Test a hash from an outdated hasher is upgraded on check """
+    user = get_user_model().objects.create(
+        email='test@test.com',
+        password=make_password('test123', hasher='pbkdf2_sha1')
+    )
+
+    assert hashing.check_password(user, 'test123')
+    user.refresh_from_db()
+    assert not user.password.startswith('pbkdf2_sha1$')
+    assert user.check_password('test123')
+
+
+def test_saturated_queue_rejects(metrics, monkeypatch):
+    """ Test hashing is rejected straight away when the queue is full """
+    slots = hashing.threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(hashing, '_slots', slots)
+
+    with pytest.raises(hashing.HashingUnavailable):
+        hashing.make_password('test123')
+    assert hashing.hashing_stats()['rejected'] == 1
+
+
+@pytest.mark.django_db
+def test_backend_checks_in_pool(metrics):
+    """ Test the authentication backend checks passwords in the pool """
+    user = get_user_model().objects.create_user('test@test.com', 'test123')
+
+    assert authenticate(username='test@test.com', password='test123') == user
+    assert authenticate(username='test@test.com', password='wrong') is None
+    assert authenticate(username='no@test.com', password='test123') is None
+    assert hashing.hashing_stats()['completed'] == 3
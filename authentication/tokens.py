@@ -0,0 +1,120 @@
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+TOKEN_TTLS = {
+    ACCESS: getattr(settings, 'ACCESS_TOKEN_TTL', 15 * 60),
+    REFRESH: getattr(settings, 'REFRESH_TOKEN_TTL', 7 * 24 * 60 * 60),
+}
+SALT = 'authentication.tokens'
+
+
+def signed_tokens_enabled():
+    """ Return whether logins issue signed tokens """
+    return getattr(settings, 'AUTH_TOKEN_MODE', 'legacy') == 'signed'
+
+
+def is_signed_token(key):
+    """ Return whether a token key is a signed token """
+    return ':' in key
+
+
+def legacy_token_expired(token):
+    """ Return whether a legacy token is older than the allowed age
+
+    Legacy tokens only expire once LEGACY_TOKEN_MAX_AGE_DAYS is set.
+    """
+    days = getattr(settings, 'LEGACY_TOKEN_MAX_AGE_DAYS', None)
+    if days is None:
+        return False
+
+    return token.created < timezone.now() - timedelta(days=days)
+
+
+def issue_token(user, kind):
+    """ Return a signed token of the given kind for a user """
+    claims = {
+        'uid': user.pk,
+        'email': user.email,
+        'staff': user.is_staff,
+        'kind': kind,
+        'jti': secrets.token_urlsafe(12),
+        'iat': time.time(),
+    }
+
+    return signing.dumps(claims, salt=f'{SALT}.{kind}', compress=True)
+
+
+def read_token(key, kind):
+    """ Return the claims of a valid token of the given kind
+
+    Raises signing.BadSignature when the token is forged, expired or
+    revoked. Only the cache is consulted, never the database.
+    """
+    claims = signing.loads(
+        key,
+        salt=f'{SALT}.{kind}',
+        max_age=TOKEN_TTLS[kind]
+    )
+    if is_revoked(claims):
+        raise signing.BadSignature('Token revoked')
+
+    return claims
+
+
+def _revoked_key(jti):
+    return f'auth:revoked:{jti}'
+
+
+def _revoked_before_key(user_id):
+    return f'auth:revoked-before:{user_id}'
+
+
+def is_revoked(claims):
+    """ Return whether a token or all tokens of its user were revoked """
+    keys = [_revoked_key(claims['jti']), _revoked_before_key(claims['uid'])]
+    revoked = cache.get_many(keys)
+
+    return keys[0] in revoked or claims['iat'] < revoked.get(keys[1], 0)
+
+
+def revoke_token(claims):
+    """ Revoke a single token until it expires anyway """
+    remaining = claims['iat'] + TOKEN_TTLS[claims['kind']] - time.time()
+    if remaining > 0:
+        cache.set(_revoked_key(claims['jti']), True, remaining)
+
+
+def revoke_user_tokens(user_id):
+    """ Revoke every token issued to a user so far """
+    cache.set(
+        _revoked_before_key(user_id),
+        time.time(),
+        max(TOKEN_TTLS.values())
+    )
+
+
+def token_user(claims):
+    """ Return a user built from token claims, without a database query
+
+    The user only carries what the claims hold; views that need the
+    complete user must fetch it.
+    """
+    user = get_user_model()(
+        pk=claims['uid'],
+        email=claims['email'],
+        is_staff=claims['staff'],
+        is_active=True
+    )
+    user._state.adding = False
+
+    return user
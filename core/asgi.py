@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+os.environ.setdefault('RECIPE_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Connect, import and prime caches before the worker takes requests. Leave
+# it off with gunicorn --preload, which would warm up the master before fork
+if os.getenv('DJANGO_WARM_UP') == '1':
+    from core.warmup import warm_up
+    warm_up()
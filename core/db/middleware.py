@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from core.db.routers import reset_replica, use_replica
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Marks a client that wrote recently, so its reads go to the primary
+PIN_COOKIE = 'db_primary_pin'
+
+
+class ReplicaRoutingMiddleware:
+    """ Serve safe requests from replicas, keeping writers on the primary
+
+    Writes, sign up and log in included, pin their client to the primary
+    for REPLICA_PIN_SECONDS, so it sees its own writes even while replicas
+    lag. The pin is kept twice: in a cookie, which survives a change of
+    credentials, and under a hash of the Authorization header in the
+    default cache, for token clients that drop cookies. The latter needs
+    a cache shared by every worker to hold across them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Lets Django call this middleware as a coroutine function
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def _pin_key(self, request):
+        """ Return the cache key pinning the request's credentials, if any
+        """
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        if not credentials:
+            return None
+
+        digest = hashlib.sha256(credentials.encode()).hexdigest()
+        return f'db:primary-pin:{digest}'
+
+    def _read_replica(self, request):
+        """ Return whether a request may read from a replica """
+        if request.method not in SAFE_METHODS or \
+                PIN_COOKIE in request.COOKIES:
+            return False
+
+        key = self._pin_key(request)
+        return key is None or cache.get(key) is None
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS:
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+            key = self._pin_key(request)
+            if key is not None:
+                cache.set(key, 1, seconds)
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=seconds,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax'
+            )
+
+        return response
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        token = use_replica(self._read_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica(token)
+
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        # The cache is only reachable synchronously
+        read_replica = await sync_to_async(
+            self._read_replica, thread_sensitive=False
+        )(request)
+        token = use_replica(read_replica)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_replica(token)
+
+        return await sync_to_async(self._pin, thread_sensitive=False)(
+            request, response
+        )
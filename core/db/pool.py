@@ -0,0 +1,211 @@
+import collections
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """ Raised when no connection is free within the pool timeout """
+
+
+class ConnectionPool:
+    """ Thread-safe pool of database connections
+
+    Connections are opened by the ``connect`` callable, up to
+    ``max_size`` of them, and ``min_size`` are opened up front. A
+    checkout waits up to ``timeout`` seconds for a free connection.
+    Idle connections are checked with ``check`` before being handed out,
+    and connections older than ``max_lifetime`` seconds are closed
+    instead of being reused.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, max_lifetime=3600,
+                 timeout=30, check=None):
+        self._connect = connect
+        self._check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = collections.deque()
+        self._opened_at = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._counters = collections.Counter()
+        self._max_wait = 0.0
+
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            self._idle.append(self._open())
+
+    def _open(self):
+        """ Open a connection, giving its slot back when that fails """
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        self._opened_at[conn] = time.monotonic()
+        self._count('opened')
+        return conn
+
+    def _count(self, counter, value=1):
+        with self._cond:
+            self._counters[counter] += value
+
+    def _discard(self, conn):
+        """ Close a connection and free its slot """
+        self._opened_at.pop(conn, None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _expired(self, conn):
+        opened_at = self._opened_at.get(conn)
+        return opened_at is None or \
+            time.monotonic() - opened_at >= self.max_lifetime
+
+    def _healthy(self, conn):
+        if self._check is None:
+            return True
+        try:
+            return self._check(conn)
+        except Exception:
+            return False
+
+    def getconn(self):
+        """ Check a healthy connection out of the pool
+
+        Raises PoolTimeout when none is free within the timeout.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No connection free after {self.timeout}s'
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    self._size += 1
+
+            if conn is None:
+                conn = self._open()
+            elif self._expired(conn):
+                self._count('recycled')
+                self._discard(conn)
+                continue
+            elif not self._healthy(conn):
+                self._count('failed_checks')
+                self._discard(conn)
+                continue
+            break
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._counters['checkouts'] += 1
+            self._counters['wait_time'] += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """ Return a checked out connection to the pool
+
+        Connections flagged for discarding, past their lifetime or
+        returned after the pool was closed are closed instead.
+        """
+        if discard or self._closed or self._expired(conn):
+            if not discard and not self._closed:
+                self._count('recycled')
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self):
+        """ Close the idle connections and those returned from now on """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), collections.deque()
+            self._cond.notify_all()
+
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """ Return the pool size, usage and checkout wait times """
+        with self._cond:
+            checkouts = self._counters['checkouts']
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._size - len(self._idle),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'checkouts': checkouts,
+                'opened': self._counters['opened'],
+                'recycled': self._counters['recycled'],
+                'failed_checks': self._counters['failed_checks'],
+                'timeouts': self._counters['timeouts'],
+                'wait_ms_avg': (
+                    self._counters['wait_time'] / checkouts * 1000
+                    if checkouts else 0.0
+                ),
+                'wait_ms_max': self._max_wait * 1000,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """ Return the pool registered under a key, creating it if needed """
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def close_pools(match=lambda key: True):
+    """ Close and forget the pools whose key matches """
+    with _pools_lock:
+        keys = [key for key in _pools if match(key)]
+        pools = [_pools.pop(key) for key in keys]
+
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """ Return the statistics of every pool, by database alias """
+    with _pools_lock:
+        pools = list(_pools.items())
+
+    return {key[0]: pool.stats() for key, pool in pools}
@@ -0,0 +1,113 @@
+from django.db.backends.postgresql import base, creation
+from django.db.utils import NO_DB_ALIAS
+from psycopg2 import extensions, extras
+
+from core.db.pool import ConnectionPool, close_pools, get_pool
+
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'MAX_LIFETIME': 3600,
+    'TIMEOUT': 30,
+    'CHECK': True,
+}
+
+
+def open_connection(conn_params, isolation_level=None):
+    """ Open a connection set up as the PostgreSQL backend does """
+    conn = base.Database.connect(**conn_params)
+    if isolation_level is not None and \
+            isolation_level != conn.isolation_level:
+        conn.set_session(isolation_level=isolation_level)
+    extras.register_default_jsonb(conn_or_curs=conn, loads=lambda x: x)
+
+    return conn
+
+
+def check_connection(conn):
+    """ Return whether a pooled connection still answers """
+    if conn.closed:
+        return False
+
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not conn.autocommit:
+        conn.rollback()
+
+    return True
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        """ Close pooled connections to the test database before dropping it
+        """
+        close_pools(lambda key: key[1] == test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """ PostgreSQL backend checking connections out of a pool
+
+    Closing a connection, as Django does at the end of every request with
+    CONN_MAX_AGE = 0, returns it to the pool instead. Pool sizes, the
+    maximum lifetime of a connection and the checkout timeout come from
+    the POOL setting of the database.
+    """
+    creation_class = DatabaseCreation
+
+    @property
+    def pool_settings(self):
+        return {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+
+    def _get_pool(self, conn_params):
+        options = self.pool_settings
+        key = (
+            self.alias,
+            conn_params.get('database'),
+            repr(sorted(conn_params.items()))
+        )
+        isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level'
+        )
+
+        return get_pool(key, lambda: ConnectionPool(
+            lambda: open_connection(conn_params, isolation_level),
+            min_size=options['MIN_SIZE'],
+            max_size=options['MAX_SIZE'],
+            max_lifetime=options['MAX_LIFETIME'],
+            timeout=options['TIMEOUT'],
+            check=check_connection if options['CHECK'] else None
+        ))
+
+    def get_new_connection(self, conn_params):
+        """ Check a connection out of the pool of these parameters """
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+
+        self.pool = self._get_pool(conn_params)
+        connection = self.pool.getconn()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level
+        )
+
+        return connection
+
+    def _close(self):
+        """ Return the connection to the pool, dropping it when broken """
+        if self.connection is None or self.alias == NO_DB_ALIAS:
+            return super()._close()
+
+        broken = self.connection.closed or (
+            self.errors_occurred and not self.is_usable()
+        )
+        if not broken and self.connection.get_transaction_status() != \
+                extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                self.connection.rollback()
+            except Exception:
+                broken = True
+
+        self.pool.putconn(self.connection, discard=broken)
@@ -0,0 +1,45 @@
+import contextvars
+import random
+
+from django.conf import settings
+
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def use_replica(enabled):
+    """ Route the reads of the current context to replicas, or not
+
+    Returns a token for ``reset_replica``.
+    """
+    return _use_replica.set(enabled)
+
+
+def reset_replica(token):
+    _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """ Send reads to a random replica when the context allows it
+
+    Replicas are the aliases listed in REPLICA_DATABASES. Reads go to the
+    primary unless the replica middleware marked the request as safe to
+    serve from a replica; writes and migrations always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        if replicas and _use_replica.get():
+            return random.choice(replicas)
+
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """ Replicas hold the same rows as the primary """
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,30 @@
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, \
+    orjson
+
+
+class ORJSONParser(parsers.JSONParser):
+    """ JSON parser decoding with orjson """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """ Parse a JSON request body """
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(parsers.BaseParser):
+    """ Parser for MessagePack request bodies """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """ Parse a MessagePack request body """
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except ValueError as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
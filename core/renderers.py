@@ -0,0 +1,60 @@
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _default(obj):
+    """ Encode what the fast encoders don't know, as DRF's encoder does """
+    return encoders.JSONEncoder().default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """ JSON renderer encoding with orjson
+
+    Produces the same JSON as DRF's renderer, several times faster.
+    Indented output, as the browsable API asks for, is left to it.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """ Render data into JSON, returning a bytestring """
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+        # Escaped like DRF does, so the output stays a javascript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """ Renderer encoding responses as MessagePack """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """ Render data into MessagePack, returning a bytestring """
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=_default, use_bin_type=True)
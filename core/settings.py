@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import logging
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -45,13 +47,14 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
 
-    'authentication',
+    'authentication.apps.AuthenticationConfig',
     'user',
-    'recipe',
+    'recipe.apps.RecipeConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.db.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -95,6 +98,58 @@ DATABASES = {
     }
 }
 
+# Check PostgreSQL connections out of a pool instead of opening one per
+# request; connections are returned when Django closes them
+if os.getenv('POSTGRES_POOL') == '1':
+    DATABASES['default']['ENGINE'] = 'core.db.pooled'
+    DATABASES['default']['POOL'] = {
+        'MIN_SIZE': int(os.getenv('POSTGRES_POOL_MIN_SIZE') or 1),
+        'MAX_SIZE': int(os.getenv('POSTGRES_POOL_MAX_SIZE') or 10),
+        'MAX_LIFETIME': int(os.getenv('POSTGRES_POOL_MAX_LIFETIME') or 3600),
+        'TIMEOUT': int(os.getenv('POSTGRES_POOL_TIMEOUT') or 30),
+        'CHECK': True,
+    }
+
+# Read replicas, as a comma separated list of hosts sharing the primary's
+# credentials; safe requests read from them, see core/db/middleware.py.
+# Locally, a replica can point at the primary's own host
+REPLICA_DATABASES = []
+for index, host in enumerate(filter(None, (
+    os.getenv('POSTGRES_REPLICA_HOSTS') or ''
+).split(','))):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Seconds a client reads from the primary after its own writes. Clients are
+# pinned by cookie and by their Authorization header; the latter is kept in
+# the default cache, so token clients without cookies stay pinned across
+# workers only with a shared CACHE_BACKEND
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND') or
+        'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.getenv('CACHE_LOCATION') or '',
+    }
+}
+
+# Tag and ingredient lists are cached per user, with ETags from the cache
+# version. Both stay off with a local-memory CACHE_BACKEND, which each worker
+# has its own copy of
+RECIPE_LIST_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -135,5 +190,68 @@ USE_TZ = True
 STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 
+# Django REST framework
+# Fast JSON and MessagePack support is enabled when orjson and msgpack are
+# installed, as the "fast" extra does; clients pick MessagePack with
+# Accept: application/msgpack
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer' if find_spec('orjson')
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser' if find_spec('orjson')
+        else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(
+        1, 'core.renderers.MessagePackRenderer'
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(
+        1, 'core.parsers.MessagePackParser'
+    )
+for module in ('orjson', 'msgpack'):
+    if not find_spec(module):
+        logging.getLogger(__name__).warning(
+            '%s is not installed, falling back to the standard renderers '
+            'and parsers', module
+        )
+
+# Serve recipe endpoints with async views running on a pool of
+# RECIPE_ASYNC_WORKERS threads; core/asgi.py turns this on
+RECIPE_ASYNC_VIEWS = os.getenv('RECIPE_ASYNC_VIEWS') == '1'
+RECIPE_ASYNC_WORKERS = int(os.getenv('RECIPE_ASYNC_WORKERS') or 16)
+
+# Auth tokens: 'legacy' issues database tokens, 'signed' issues short-lived
+# signed access tokens with refresh tokens, verified without the database.
+# Signed tokens keep revocations in the default cache, so they need a
+# CACHE_BACKEND shared by every worker. Legacy tokens expire after
+# LEGACY_TOKEN_MAX_AGE_DAYS when it is set, and never by default
+AUTH_TOKEN_MODE = os.getenv('AUTH_TOKEN_MODE') or 'legacy'
+ACCESS_TOKEN_TTL = 15 * 60
+REFRESH_TOKEN_TTL = 7 * 24 * 60 * 60
+LEGACY_TOKEN_MAX_AGE_DAYS = None
+
+# Password hashing for sign up and log in runs in a pool of worker processes;
+# requests beyond the queue size get a 503 with Retry-After. 0 workers hashes
+# on the request worker, still bounded by the queue size. Log ins check
+# passwords in the pool through the authentication backend
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS') or 2)
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE') or 32)
+PASSWORD_HASH_RETRY_AFTER = 1
+AUTHENTICATION_BACKENDS = ['authentication.backends.HashingPoolBackend']
+
+# Recipe image storage: 'uuid' names each upload by a random uuid, 'content'
+# names files by content hash and shares identical uploads
+RECIPE_IMAGE_STORAGE = os.getenv('RECIPE_IMAGE_STORAGE') or 'uuid'
+
+# Recipe exports read this many rows per server-side cursor fetch
+RECIPE_EXPORT_CHUNK_SIZE = 2000
+
 AUTH_USER_MODEL = 'authentication.User'
 
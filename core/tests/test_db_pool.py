@@ -0,0 +1,134 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def make(**kwargs):
+        def connect():
+            opened.append(FakeConnection())
+            return opened[-1]
+        return ConnectionPool(connect, **kwargs)
+    return make
+
+
+def test_min_size_opened_up_front(make_pool, opened):
+    """ Test the pool opens its minimum size of connections when created """
+    pool = make_pool(min_size=2)
+
+    assert len(opened) == 2
+    assert pool.stats()['idle'] == 2
+
+
+def test_connection_reused(make_pool, opened):
+    """ Test a returned connection is handed out again """
+    pool = make_pool(min_size=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+
+    assert pool.getconn() is conn
+    assert len(opened) == 1
+    assert pool.stats()['in_use'] == 1
+
+
+def test_max_size_timeout(make_pool):
+    """ Test checkouts beyond the maximum size time out """
+    pool = make_pool(min_size=0, max_size=1, timeout=0.01)
+    pool.getconn()
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiter_gets_returned_connection(make_pool):
+    """ Test a waiting checkout gets the next returned connection """
+    pool = make_pool(min_size=0, max_size=1, timeout=5)
+    conn = pool.getconn()
+    checked_out = []
+
+    waiter = threading.Thread(target=lambda: checked_out.append(
+        pool.getconn()
+    ))
+    waiter.start()
+    pool.putconn(conn)
+    waiter.join()
+
+    assert checked_out == [conn]
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_unhealthy_connection_replaced(make_pool, opened):
+    """ Test a connection failing its check is closed and replaced """
+    pool = make_pool(min_size=1, check=lambda conn: not conn.closed)
+    opened[0].closed = True
+
+    conn = pool.getconn()
+
+    assert conn is opened[1]
+    assert pool.stats()['failed_checks'] == 1
+    assert pool.stats()['size'] == 1
+
+
+def test_expired_connection_recycled(make_pool, opened):
+    """ Test connections past their lifetime are closed, not reused """
+    pool = make_pool(min_size=0, max_lifetime=60)
+    conn = pool.getconn()
+
+    with patch('core.db.pool.time.monotonic', return_value=10 ** 9):
+        pool.putconn(conn)
+
+    assert conn.closed
+    assert pool.stats()['recycled'] == 1
+    assert pool.stats()['size'] == 0
+
+
+def test_discarded_connection_closed(make_pool):
+    """ Test a connection returned as broken is closed """
+    pool = make_pool(min_size=0)
+    conn = pool.getconn()
+    pool.putconn(conn, discard=True)
+
+    assert conn.closed
+    assert pool.stats()['size'] == 0
+
+
+@pytest.mark.django_db
+def test_pooled_postgresql_backend():
+    """ Test the pooled backend hands the same connection back """
+    if connection.vendor != 'postgresql':
+        pytest.skip('Needs a PostgreSQL database')
+    from core.db.pooled.base import DatabaseWrapper
+
+    wrapper = DatabaseWrapper({
+        **connection.settings_dict,
+        'POOL': {'MIN_SIZE': 0, 'MAX_SIZE': 1},
+    }, alias='pooled')
+    wrapper.ensure_connection()
+    raw = wrapper.connection
+    wrapper.close()
+    wrapper.ensure_connection()
+
+    assert wrapper.connection is raw
+    assert wrapper.pool.stats()['checkouts'] == 2
+    wrapper.close()
+    wrapper.pool.close()
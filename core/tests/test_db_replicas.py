@@ -0,0 +1,144 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.db.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from core.db.routers import ReplicaRouter, reset_replica, use_replica
+from recipe.models import Recipe
+
+
+AUTH = {'HTTP_AUTHORIZATION': 'Token abc'}
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.REPLICA_DATABASES = ['replica']
+
+
+@pytest.fixture
+def routed():
+    """ Return a middleware recording where a request's reads went """
+    reads = []
+
+    def get_response(request):
+        reads.append(ReplicaRouter().db_for_read(Recipe))
+        return HttpResponse()
+
+    return ReplicaRoutingMiddleware(get_response), reads
+
+
+def test_router_defaults_to_primary():
+    """ Test reads outside a routed request go to the primary """
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Recipe) == 'default'
+    token = use_replica(True)
+    try:
+        assert router.db_for_read(Recipe) == 'replica'
+        assert router.db_for_write(Recipe) == 'default'
+    finally:
+        reset_replica(token)
+
+
+def test_router_without_replicas(settings):
+    """ Test reads stay on the primary when no replica is configured """
+    settings.REPLICA_DATABASES = []
+    token = use_replica(True)
+    try:
+        assert ReplicaRouter().db_for_read(Recipe) == 'default'
+    finally:
+        reset_replica(token)
+
+
+def test_safe_requests_read_replica(routed):
+    """ Test safe requests read from a replica, writes from the primary """
+    middleware, reads = routed
+    factory = RequestFactory()
+
+    middleware(factory.get('/'))
+    middleware(factory.post('/'))
+
+    assert reads == ['replica', 'default']
+
+
+def test_writer_pinned_to_primary(routed):
+    """ Test a client reads its own writes from the primary """
+    middleware, reads = routed
+    factory = RequestFactory()
+
+    response = middleware(factory.post('/'))
+    pinned = factory.get('/')
+    pinned.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+    middleware(pinned)
+    middleware(factory.get('/'))
+
+    assert reads == ['default', 'default', 'replica']
+
+
+def test_token_writer_pinned_to_primary(routed):
+    """ Test a client dropping cookies is pinned by its credentials """
+    middleware, reads = routed
+    factory = RequestFactory()
+
+    middleware(factory.post('/', **AUTH))
+    middleware(factory.get('/', **AUTH))
+    middleware(factory.get('/', HTTP_AUTHORIZATION='Token other'))
+    middleware(factory.get('/'))
+
+    assert reads == ['default', 'default', 'replica', 'replica']
+
+
+def test_pin_expires(routed, settings):
+    """ Test the pin cookie only lasts REPLICA_PIN_SECONDS """
+    settings.REPLICA_PIN_SECONDS = 3
+    middleware, reads = routed
+
+    response = middleware(RequestFactory().post('/', **AUTH))
+
+    assert response.cookies[PIN_COOKIE]['max-age'] == 3
+    assert response.cookies[PIN_COOKIE]['httponly']
+
+
+def test_async_middleware():
+    """ Test the middleware routes reads when called as a coroutine """
+    reads = []
+
+    async def get_response(request):
+        reads.append(ReplicaRouter().db_for_read(Recipe))
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    async_to_sync(middleware)(RequestFactory().get('/'))
+
+    assert reads == ['replica']
+
+
+def test_async_middleware_pinned():
+    """ Test the middleware pins credentials when called as a coroutine """
+    reads = []
+
+    async def get_response(request):
+        reads.append(ReplicaRouter().db_for_read(Recipe))
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    async_to_sync(middleware)(RequestFactory().post('/', **AUTH))
+    async_to_sync(middleware)(RequestFactory().get('/', **AUTH))
+
+    assert reads == ['default', 'default']
+
+
+@pytest.mark.django_db
+def test_signup_pins_client(client):
+    """ Test signing up pins the new client to the primary """
+    response = client.post(reverse('user:create'), {
+        'email': 'test@test.com',
+        'password': 'testpass',
+        'name': 'Test'
+    })
+
+    assert response.status_code == 201
+    assert PIN_COOKIE in response.cookies
+    assert PIN_COOKIE in client.cookies
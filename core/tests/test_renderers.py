@@ -0,0 +1,69 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+DATA = {
+    'id': 1,
+    'price': decimal.Decimal('5.50'),
+    'created': datetime.datetime(2020, 1, 2, 3, 4, 5, 678901,
+                                 tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2020, 1, 2),
+    'uuid': uuid.UUID(int=1),
+    'label': gettext_lazy('Recipe'),
+    'text': 'line separator',
+    'counts': {1: 'one'},
+    'tags': [{'id': 1, 'name': 'Vegan'}],
+}
+
+
+def test_orjson_renderer_matches_json_renderer():
+    """ Test the orjson renderer outputs what DRF's renderer does """
+    assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_orjson_renderer_indent():
+    """ Test indented output is left to DRF's renderer """
+    rendered = ORJSONRenderer().render(
+        DATA, 'application/json; indent=2', {}
+    )
+
+    assert rendered == JSONRenderer().render(
+        DATA, 'application/json; indent=2', {}
+    )
+
+
+def test_orjson_parser():
+    """ Test request bodies are parsed, and bad ones rejected """
+    parser = ORJSONParser()
+
+    assert parser.parse(io.BytesIO(b'{"names": ["Kale"]}')) == \
+        {'names': ['Kale']}
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"names": '))
+
+
+def test_msgpack_round_trip():
+    """ Test MessagePack responses parse back to the same data """
+    pytest.importorskip('msgpack')
+    from core.parsers import MessagePackParser
+    from core.renderers import MessagePackRenderer
+
+    data = {key: value for key, value in DATA.items() if key != 'counts'}
+    rendered = MessagePackRenderer().render(data)
+    parsed = MessagePackParser().parse(io.BytesIO(rendered))
+
+    assert parsed['price'] == 5.5
+    assert parsed['created'] == '2020-01-02T03:04:05.678901Z'
+    assert parsed['tags'] == DATA['tags']
+    with pytest.raises(ParseError):
+        MessagePackParser().parse(io.BytesIO(rendered[:-1] + b'\xc1'))
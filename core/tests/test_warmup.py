@@ -0,0 +1,25 @@
+from unittest.mock import call, MagicMock, patch
+
+import pytest
+
+from core.warmup import open_connections, warm_up
+
+
+@pytest.mark.django_db
+def test_warm_up():
+    """ Test the warm-up runs every step, starting the hashing pool """
+    with patch('authentication.hashing.start_workers') as start_workers:
+        timings = warm_up()
+
+    assert [step for step, _ in timings] == \
+        ['connections', 'modules', 'caches', 'workers']
+    start_workers.assert_called_once()
+
+
+def test_open_connections_closed():
+    """ Test warm-up connections are closed, going back to their pools """
+    connection = MagicMock()
+    with patch('core.warmup.connections.all', return_value=[connection]):
+        open_connections()
+
+    assert connection.mock_calls == [call.ensure_connection(), call.close()]
@@ -0,0 +1,71 @@
+import importlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connections
+from django.urls import get_resolver
+
+
+def open_connections():
+    """ Connect to every database once, filling connection pools
+
+    Request threads get connections of their own, so each one opened
+    here is closed again; pooled backends take it back into the pool.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+        connection.close()
+
+
+def import_modules():
+    """ Import the URL confs, and with them every view and serializer """
+    get_resolver().reverse_dict
+    for app_config in apps.get_app_configs():
+        for name in ('serializers', 'views'):
+            try:
+                importlib.import_module(f'{app_config.name}.{name}')
+            except ModuleNotFoundError as exc:
+                if exc.name != f'{app_config.name}.{name}':
+                    raise
+
+
+def prime_caches():
+    """ Fill the content type cache and connect to every cache backend """
+    ContentType.objects.get_for_models(*apps.get_models())
+    for alias in settings.CACHES:
+        caches[alias].get('warm-up')
+
+
+def start_workers():
+    """ Start the password hashing process pool """
+    from authentication import hashing
+
+    hashing.start_workers()
+
+
+STEPS = (
+    ('connections', open_connections),
+    ('modules', import_modules),
+    ('caches', prime_caches),
+    ('workers', start_workers),
+)
+
+
+def warm_up():
+    """ Run the warm-up steps, returning how long each one took
+
+    Meant to run in a worker before it reports ready, so the first
+    requests don't pay for connecting, importing or filling caches.
+    Not with gunicorn --preload: it would run once in the master, which
+    would hold connections and the hashing processes across the fork.
+    """
+    timings = []
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step()
+        timings.append((name, time.perf_counter() - start))
+
+    return timings
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Connect, import and prime caches before the worker takes requests. Leave
+# it off with gunicorn --preload, which would warm up the master before fork
+if os.getenv('DJANGO_WARM_UP') == '1':
+    from core.warmup import warm_up
+    warm_up()
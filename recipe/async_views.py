@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern, re_path
+
+
+WORKERS = getattr(settings, 'RECIPE_ASYNC_WORKERS', 16)
+
+READ_METHODS = ('GET', 'HEAD')
+READ_ACTIONS = ('list', 'retrieve')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """ Return the shared view worker pool, starting it if needed """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS,
+                thread_name_prefix='recipe-views'
+            )
+
+    return _executor
+
+
+def _run_view(view, request, *args, **kwargs):
+    """ Run a view and render its response on a worker thread
+
+    Django only closes the connections of the thread serving the
+    request, so stale ones of the worker are dropped here.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """ Return an async view running the reads of a DRF view in a pool
+
+    Under ASGI, Django runs synchronous views one at a time on a single
+    thread. Here the event loop only awaits the worker, so a slow client
+    costs a coroutine rather than a thread, and reads run in parallel on
+    the pool. Authentication, the ORM and rendering all stay on the
+    worker thread, never on the event loop. The view runs in a copy of
+    the request's context, so context set by middleware carries over.
+
+    Other methods run on Django's thread for synchronous code, as they
+    would unwrapped.
+    """
+    @functools.wraps(view)
+    async def wrapped_view(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(view, thread_sensitive=True)(
+                request, *args, **kwargs
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_executor(),
+            contextvars.copy_context().run,
+            functools.partial(_run_view, view, request, *args, **kwargs)
+        )
+
+    # django.views.decorators.csrf.csrf_exempt would make the view sync
+    wrapped_view.csrf_exempt = getattr(view, 'csrf_exempt', False)
+
+    return wrapped_view
+
+
+def _is_read_route(pattern):
+    """ Return whether a router pattern lists or retrieves objects """
+    actions = getattr(pattern.callback, 'actions', None) or {}
+
+    return actions.get('get') in READ_ACTIONS
+
+
+def async_urlpatterns(urlpatterns):
+    """ Return router URL patterns with their list and detail views async
+    """
+    return [
+        re_path(
+            pattern.pattern.regex.pattern,
+            async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name
+        ) if isinstance(pattern, URLPattern) and _is_read_route(pattern)
+        else pattern
+        for pattern in urlpatterns
+    ]
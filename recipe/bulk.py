@@ -0,0 +1,162 @@
+from django.db import transaction
+from django.db.models import CharField, Value
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from recipe.cache import invalidate_lists
+from recipe.counts import refresh_usage_counts
+from recipe.models import Tag, Ingredient, Recipe, RecipeSearchTerm
+from recipe.search import build_document, build_search_terms, \
+    uses_full_text
+from recipe.serializers import RecipeBulkItemSerializer
+
+
+MAX_BULK_SIZE = 1000
+RELATIONS = (('tags', Tag), ('ingredients', Ingredient))
+
+
+def _owned_names(user, requested):
+    """ Return the names of the requested tags and ingredients of a user
+
+    Both relations are looked up in a single UNION query, keyed by
+    (relation, id).
+    """
+    querysets = [
+        model.objects.filter(user=user, pk__in=requested[field]).annotate(
+            relation=Value(field, output_field=CharField())
+        ).values_list('id', 'name', 'relation')
+        for field, model in RELATIONS
+    ]
+    rows = querysets[0].union(*querysets[1:], all=True)
+
+    return {(relation, pk): name for pk, name, relation in rows}
+
+
+def _assign_pks(user, recipes):
+    """ Set the ids of bulk created recipes on backends not returning them
+
+    Runs inside the creating transaction, which holds the database write
+    lock on such backends, so the user's newest rows are the new ones.
+    """
+    if not recipes or recipes[0].pk is not None:
+        return
+
+    pks = Recipe.objects.filter(user=user).order_by('-id').values_list(
+        'id', flat=True
+    )[:len(recipes)]
+    for recipe, pk in zip(recipes, reversed(list(pks))):
+        recipe.pk = pk
+
+
+def bulk_create_recipes(user, items):
+    """ Validate and create many recipes for a user with few queries
+
+    Returns one result per item, in order, holding either the id of the
+    new recipe or the validation errors of the item.
+    """
+    # One serializer validates every item, its fields being built once
+    serializer = RecipeBulkItemSerializer()
+    validated, errors = [], []
+    for item in items:
+        try:
+            validated.append(serializer.run_validation(item))
+            errors.append({})
+        except ValidationError as exc:
+            validated.append(None)
+            errors.append(exc.detail)
+
+    requested = {field: set() for field, _ in RELATIONS}
+    for data, item_errors in zip(validated, errors):
+        if not item_errors:
+            for field, _ in RELATIONS:
+                requested[field].update(data.get(field, []))
+    names = _owned_names(user, requested)
+
+    recipes, links = [], []
+    linked = {field: set() for field, _ in RELATIONS}
+    for data, item_errors in zip(validated, errors):
+        if item_errors:
+            continue
+
+        data = dict(data)
+        related = {field: data.pop(field, []) for field, _ in RELATIONS}
+        for field, ids in related.items():
+            missing = [pk for pk in ids if (field, pk) not in names]
+            if missing:
+                item_errors[field] = [
+                    PrimaryKeyRelatedField.default_error_messages[
+                        'does_not_exist'
+                    ].format(pk_value=pk)
+                    for pk in missing
+                ]
+        if item_errors:
+            continue
+
+        recipe = Recipe(user=user, **data)
+        recipe.search_document = build_document(recipe.title, [
+            names[field, pk]
+            for field, ids in related.items() for pk in ids
+        ])
+        recipes.append(recipe)
+        links.append(related)
+        for field, ids in related.items():
+            linked[field].update(ids)
+
+    with transaction.atomic():
+        Recipe.objects.bulk_create(recipes)
+        _assign_pks(user, recipes)
+
+        for field, model in RELATIONS:
+            through = getattr(Recipe, field).through
+            target = f'{model._meta.model_name}_id'
+            through.objects.bulk_create(
+                through(recipe_id=recipe.pk, **{target: pk})
+                for recipe, related in zip(recipes, links)
+                for pk in dict.fromkeys(related[field])
+            )
+            refresh_usage_counts(model, linked[field], touch=True)
+
+        if not uses_full_text(Recipe.objects.db):
+            RecipeSearchTerm.objects.bulk_create(
+                term for recipe in recipes
+                for term in build_search_terms(recipe)
+            )
+
+    for _, model in RELATIONS:
+        invalidate_lists(model, user.pk)
+
+    created = iter(recipes)
+    return [
+        {'errors': item_errors} if item_errors
+        else {'id': next(created).pk}
+        for item_errors in errors
+    ]
+
+
+def bulk_get_or_create_attrs(model, user, names):
+    """ Return a name to id mapping of a user's tags or ingredients
+
+    Existing rows are found with one lookup and only the missing names
+    are inserted, in one batch. Names already duplicated map to their
+    oldest row.
+    """
+    names = list(dict.fromkeys(names))
+    existing = model.objects.filter(user=user, name__in=names).order_by(
+        '-id'
+    ).values_list('name', 'id')
+    mapping = dict(existing)
+
+    missing = [model(user=user, name=name) for name in names
+               if name not in mapping]
+    if missing:
+        with transaction.atomic():
+            model.objects.bulk_create(missing)
+            if missing[0].pk is None:
+                missing = model.objects.filter(
+                    user=user,
+                    name__in=[obj.name for obj in missing]
+                ).only('id', 'name')
+            mapping.update((obj.name, obj.pk) for obj in missing)
+        invalidate_lists(model, user.pk)
+
+    return {name: mapping[name] for name in names}
@@ -0,0 +1,80 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from authentication.checks import LOCAL_CACHE_BACKENDS
+
+LIST_CACHE_TIMEOUT = getattr(settings, 'RECIPE_LIST_CACHE_TIMEOUT', 300)
+HITS_KEY = 'recipe:list-cache:hits'
+MISSES_KEY = 'recipe:list-cache:misses'
+
+
+def lists_cached():
+    """ Return whether lists and their ETags follow the cache version
+
+    Writes bump the version in the cache of the worker making them, so
+    a cache of each worker's own would leave the others serving stale
+    lists; caching is off on such backends.
+    """
+    return bool(LIST_CACHE_TIMEOUT) and \
+        settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def _version_key(model, user_id):
+    """ Return the key holding the list cache version of a user """
+    return f'recipe:{model._meta.model_name}:{user_id}:version'
+
+
+def _incr(key):
+    """ Increment a counter, creating it when missing """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def list_version(model, user_id):
+    """ Return the version of a user's lists, which changes with them """
+    return cache.get_or_set(_version_key(model, user_id), time.time_ns, None)
+
+
+def list_cache_key(model, user_id, url):
+    """ Return the cache key of a user's list response for a URL
+
+    Keys embed a per-user version, so bumping the version invalidates
+    every cached list of that user at once.
+    """
+    version = list_version(model, user_id)
+    digest = hashlib.md5(url.encode()).hexdigest()
+
+    return f'recipe:{model._meta.model_name}:{user_id}:{version}:{digest}'
+
+
+def get_cached_list(key):
+    """ Return cached list data, counting the hit or miss """
+    data = cache.get(key)
+    _incr(MISSES_KEY if data is None else HITS_KEY)
+
+    return data
+
+
+def set_cached_list(key, data):
+    """ Store list data in the cache """
+    cache.set(key, data, LIST_CACHE_TIMEOUT)
+
+
+def invalidate_lists(model, user_id):
+    """ Invalidate every cached list of a model for a user """
+    cache.set(_version_key(model, user_id), time.time_ns(), None)
+
+
+def cache_stats():
+    """ Return the list cache hit and miss counters """
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+
+    return {
+        'hits': counters.get(HITS_KEY, 0),
+        'misses': counters.get(MISSES_KEY, 0),
+    }
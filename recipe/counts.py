@@ -0,0 +1,50 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def usage_count(recipe_model, model):
+    """ Return an expression counting the recipes using a tag or ingredient
+
+    Counts come from the through table alone, without joining recipes.
+    """
+    field = f'{model._meta.model_name}_id'
+    through = getattr(recipe_model, f'{model._meta.model_name}s').through
+
+    return Coalesce(Subquery(
+        through.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('*')).values('count')
+    ), 0)
+
+
+def refresh_usage_counts(model, ids=None, touch=False):
+    """ Recount the recipes using tags or ingredients
+
+    Recounting rather than incrementing keeps the counts right whatever
+    happened to the links before. All rows are recounted when no ids are
+    given; ``touch`` also bumps their updated_at.
+    """
+    queryset = model.objects.all()
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return 0
+        queryset = queryset.filter(pk__in=ids)
+
+    from recipe.models import Recipe
+
+    values = {'recipe_count': usage_count(Recipe, model)}
+    if touch:
+        values['updated_at'] = timezone.now()
+
+    return queryset.update(**values)
+
+
+def stale_usage_counts(model):
+    """ Return the rows whose stored recipe count is wrong """
+    from recipe.models import Recipe
+
+    return model.objects.annotate(
+        actual=usage_count(Recipe, model)
+    ).exclude(recipe_count=F('actual'))
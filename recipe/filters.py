@@ -0,0 +1,35 @@
+from django.db.models import Count, Exists, OuterRef
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_NONE = 'none'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL, MATCH_NONE)
+
+
+def filter_by_related_ids(queryset, field_name, ids, mode=MATCH_ANY):
+    """ Filter a queryset by the ids of one of its many to many relations
+
+    The relation is tested with subqueries against its through table, so
+    the cost follows the number of requested ids instead of the size of a
+    join, and each row is returned at most once.
+    """
+    field = queryset.model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+
+    ids = set(ids)
+    links = through.objects.filter(**{f'{target}__in': ids})
+
+    if mode == MATCH_ALL:
+        matching = links.values(source).annotate(
+            matched=Count(target)
+        ).filter(matched=len(ids)).values(source)
+        return queryset.filter(pk__in=matching)
+
+    linked = Exists(links.filter(**{source: OuterRef('pk')}))
+    if mode == MATCH_NONE:
+        return queryset.filter(~linked)
+
+    return queryset.filter(linked)
@@ -0,0 +1,168 @@
+import csv
+import json
+
+from django.db import transaction
+
+from recipe.bulk import bulk_create_recipes, bulk_get_or_create_attrs, \
+    RELATIONS
+from recipe.export import LIST_SEPARATOR
+from recipe.models import Tag
+
+
+COLUMNS = ('title', 'time_minutes', 'price', 'link')
+MAX_NAME_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def _messages(errors, path=()):
+    """ Yield the messages of validation errors, prefixed by their field """
+    if isinstance(errors, dict):
+        for key, detail in errors.items():
+            yield from _messages(detail, path + (str(key),))
+    elif isinstance(errors, list):
+        for detail in errors:
+            yield from _messages(detail, path)
+    else:
+        yield f'{".".join(path)}: {errors}' if path else str(errors)
+
+
+class RecipeImportError(Exception):
+    """ A record of an import could not be created """
+
+    def __init__(self, number, errors):
+        self.number = number
+        self.errors = errors
+        super().__init__(f'Record {number}: {"; ".join(_messages(errors))}')
+
+
+class RecipeReadError(Exception):
+    """ A line of an import could not be read """
+
+    def __init__(self, line, error):
+        self.line = line
+        super().__init__(f'Line {line}: {error}')
+
+
+def read_ndjson(lines):
+    """ Yield the records of lines of JSON, skipping blank lines """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise RecipeReadError(number, exc.msg)
+        if not isinstance(record, dict):
+            raise RecipeReadError(number, 'Expecting an object')
+        yield record
+
+
+def read_csv(lines):
+    """ Yield the records of CSV lines, as written by the export """
+    reader = csv.DictReader(lines)
+    try:
+        for record in reader:
+            for field, _ in RELATIONS:
+                value = record.get(field) or ''
+                record[field] = [
+                    name for name in value.split(LIST_SEPARATOR) if name
+                ]
+            yield record
+    except csv.Error as exc:
+        # line_num counts the lines of the records read before the bad one
+        raise RecipeReadError(reader.line_num + 1, exc)
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+class RecipeImporter:
+    """ Create the recipes of a user from records, a batch at a time
+
+    Records name their tags and ingredients. Names resolve to ids through
+    an in-memory map of the user's tags and ingredients, loaded once, and
+    the missing ones are created with each batch.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.ids = {
+            field: dict(
+                model.objects.filter(user=user).order_by(
+                    '-id'
+                ).values_list('name', 'id')
+            )
+            for field, model in RELATIONS
+        }
+
+    def _check(self, records, start):
+        """ Check the tags and ingredients of records are lists of names """
+        for number, record in enumerate(records, start):
+            for field, _ in RELATIONS:
+                names = record.get(field)
+                if names is None:
+                    continue
+
+                if not isinstance(names, list) or not all(
+                    isinstance(name, str) and 0 < len(name) <= MAX_NAME_LENGTH
+                    for name in names
+                ):
+                    raise RecipeImportError(number, {field: [
+                        f'Expecting a list of names of 1 to '
+                        f'{MAX_NAME_LENGTH} characters'
+                    ]})
+
+    def _resolve(self, records):
+        """ Create the tags and ingredients of records missing from the map
+        """
+        for field, model in RELATIONS:
+            missing = {
+                name for record in records
+                for name in record.get(field) or []
+                if name not in self.ids[field]
+            }
+            if missing:
+                self.ids[field].update(
+                    bulk_get_or_create_attrs(model, self.user, missing)
+                )
+
+    def import_batch(self, records, start=0):
+        """ Create a batch of recipes in one transaction
+
+        ``start`` is the number of the first record, for error reports.
+        Nothing of the batch is kept if a record is invalid.
+        """
+        self._check(records, start)
+        ids = {field: dict(names) for field, names in self.ids.items()}
+        try:
+            with transaction.atomic():
+                self._resolve(records)
+                items = [
+                    {
+                        **{
+                            column: record[column] for column in COLUMNS
+                            if column in record
+                        },
+                        **{
+                            field: [
+                                self.ids[field][name]
+                                for name in record.get(field) or []
+                            ]
+                            for field, _ in RELATIONS
+                        },
+                    }
+                    for record in records
+                ]
+                results = bulk_create_recipes(self.user, items)
+                for number, result in enumerate(results, start):
+                    if 'errors' in result:
+                        raise RecipeImportError(number, result['errors'])
+        except Exception:
+            # Tags and ingredients created for the batch were rolled back
+            self.ids = ids
+            raise
+
+        return len(results)
@@ -0,0 +1,194 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from authentication.authentication import CachedTokenAuthentication
+from core import renderers
+from recipe.filters import filter_by_related_ids, MATCH_MODES
+from recipe.models import Tag, Ingredient, Recipe
+from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+from recipe.views import RecipeViewSet
+
+
+def seed_recipes(user, recipes, attrs, per_recipe, rng):
+    """ Bulk create recipes with random tags and ingredients for a user """
+    Tag.objects.bulk_create(
+        Tag(user=user, name=f'tag {i}') for i in range(attrs)
+    )
+    Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'ingredient {i}') for i in range(attrs)
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'recipe {i}',
+            time_minutes=rng.randint(5, 120),
+            price=rng.randint(100, 9999) / 100
+        )
+        for i in range(recipes)
+    )
+
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    recipe_ids = list(
+        Recipe.objects.filter(user=user).values_list('id', flat=True)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, per_recipe)
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+    )
+
+
+class Command(BaseCommand):
+    """Django command to time recipe code paths over a seeded dataset"""
+    help = 'Seed a throwaway dataset, time a scenario and roll back'
+
+    def add_arguments(self, parser):
+        scenarios = sorted(
+            name[len('bench_'):] for name in dir(self)
+            if name.startswith('bench_')
+        )
+        parser.add_argument('scenario', choices=scenarios)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--attrs', type=int, default=50)
+        parser.add_argument('--per-recipe', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.repeat = options['repeat']
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                f'benchmark-{time.time_ns()}@example.com'
+            )
+            seed_recipes(
+                user,
+                options['recipes'],
+                options['attrs'],
+                options['per_recipe'],
+                rng
+            )
+            getattr(self, f'bench_{options["scenario"]}')(user, rng)
+            transaction.set_rollback(True)
+
+    def measure(self, label, func, unit='rows'):
+        """Run func repeatedly and report its median duration"""
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            f'{label:<30} {statistics.median(timings) * 1000:9.2f} ms'
+            f'  ({result} {unit})'
+        )
+
+    def bench_filters(self, user, rng):
+        """Compare the legacy join filter with the any/all/none modes"""
+        tag_ids = rng.sample(
+            list(Tag.objects.filter(user=user).values_list('id', flat=True)),
+            3
+        )
+        recipes = Recipe.objects.filter(user=user)
+
+        self.measure(
+            'join (tags__id__in)',
+            lambda: len(recipes.filter(tags__id__in=tag_ids))
+        )
+        for mode in MATCH_MODES:
+            self.measure(
+                f'tags_match={mode}',
+                lambda: len(
+                    filter_by_related_ids(recipes, 'tags', tag_ids, mode)
+                )
+            )
+
+    def bench_auth(self, user, rng):
+        """Compare token and cached token authentication per request"""
+        token = Token.objects.create(user=user)
+        recipe_id = Recipe.objects.filter(user=user).first().pk
+        factory = APIRequestFactory()
+
+        for auth_class in (TokenAuthentication, CachedTokenAuthentication):
+            view = RecipeViewSet.as_view(
+                {'get': 'retrieve'},
+                authentication_classes=(auth_class,)
+            )
+
+            def request():
+                with CaptureQueriesContext(connection) as ctx:
+                    view(
+                        factory.get(
+                            '/', HTTP_AUTHORIZATION=f'Token {token.key}'
+                        ),
+                        pk=recipe_id
+                    )
+                return len(ctx.captured_queries)
+
+            self.measure(auth_class.__name__, request, unit='queries')
+
+    def bench_renderers(self, user, rng):
+        """Compare encode time and payload size of the list renderers"""
+        data = RecipeSerializer(
+            Recipe.objects.filter(user=user).prefetch_related(
+                'tags', 'ingredients'
+            ),
+            many=True
+        ).data
+
+        classes = [JSONRenderer]
+        if renderers.orjson is not None:
+            classes.append(renderers.ORJSONRenderer)
+        if renderers.msgpack is not None:
+            classes.append(renderers.MessagePackRenderer)
+
+        for renderer_class in classes:
+            renderer = renderer_class()
+            self.measure(
+                renderer_class.__name__,
+                lambda: len(renderer.render(data)),
+                unit='bytes'
+            )
+
+    def bench_serializers(self, user, rng):
+        """Compare the model and values serializers of the recipe list"""
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+
+        self.measure(
+            'RecipeSerializer',
+            lambda: len(RecipeSerializer(
+                recipes.prefetch_related('tags', 'ingredients'),
+                many=True
+            ).data)
+        )
+        self.measure(
+            'RecipeValuesSerializer',
+            lambda: len(RecipeValuesSerializer(
+                RecipeValuesSerializer.values(recipes),
+                many=True
+            ).data)
+        )
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from recipe import views
+from recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command to print the query plans of the recipe endpoints"""
+    help = 'Print EXPLAIN output for the queries behind each recipe endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            help='User whose data the plans are built for (default: first)'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only)'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        users = get_user_model().objects.order_by('id')
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No matching user to build queries for')
+
+        recipe_id = Recipe.objects.filter(user=user).values_list(
+            'id', flat=True
+        ).first() or 0
+        explain_options = {'analyze': True} if options['analyze'] else {}
+
+        endpoints = (
+            (views.TagViewSet, 'list', {}),
+            (views.TagViewSet, 'list', {'assigned_only': '1'}),
+            (views.IngredientViewSet, 'list', {}),
+            (views.IngredientViewSet, 'list', {'assigned_only': '1'}),
+            (views.RecipeViewSet, 'list', {}),
+            (views.RecipeViewSet, 'list', {'tags': '1,2'}),
+            (
+                views.RecipeViewSet,
+                'list',
+                {'tags': '1,2', 'tags_match': 'all'}
+            ),
+            (
+                views.RecipeViewSet,
+                'list',
+                {'ingredients': '1', 'ingredients_match': 'none'}
+            ),
+            (views.RecipeViewSet, 'retrieve', {'pk': recipe_id}),
+        )
+        for viewset, action, params in endpoints:
+            queryset = self.get_queryset(viewset, action, user, params)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{viewset.__name__}.{action} {params}'
+            ))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
+
+    def get_queryset(self, viewset, action, user, params):
+        """Build the queryset a viewset action runs for the given params"""
+        params = dict(params)
+        pk = params.pop('pk', None)
+        request = Request(RequestFactory().get('/', params))
+        request.user = user
+
+        view = viewset(
+            action=action,
+            request=request,
+            kwargs={},
+            format_kwarg=None
+        )
+        queryset = view.get_queryset()
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+
+        return queryset
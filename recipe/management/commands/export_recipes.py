@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.export import CHUNK_SIZE, FORMATS, export_recipes
+
+
+class Command(BaseCommand):
+    """Django command to export the recipe book of a user"""
+    help = 'Stream the recipes of a user, with their tags and ingredients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument(
+            '--format',
+            choices=sorted(FORMATS),
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write to, standard output by default'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        render, _ = FORMATS[options['format']]
+        lines = render(export_recipes(user, options['chunk_size']))
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as output:
+            output.writelines(lines)
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.imports import READERS, RecipeImporter, RecipeImportError, \
+    RecipeReadError
+
+
+class Command(BaseCommand):
+    """Django command to import a recipe book for a user"""
+    help = 'Create recipes from an NDJSON or CSV file in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Input format, guessed from the file extension by default'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the records imported so far, '
+                 'PATH.checkpoint by default. It is written after each '
+                 'batch commits, so a batch interrupted in between is '
+                 'imported again on resume'
+        )
+
+    def read_checkpoint(self, path, email):
+        """Return the number of records an earlier run imported"""
+        if not os.path.exists(path):
+            return 0
+
+        with open(path) as checkpoint:
+            state = json.load(checkpoint)
+        if state['email'] != email:
+            raise CommandError(
+                f'{path} is the checkpoint of an import for {state["email"]}'
+            )
+
+        return state['records']
+
+    def write_checkpoint(self, path, email, records):
+        """Record the number of records imported, atomically
+
+        Called once a batch has committed: a crash between the commit and
+        the write leaves the previous count, and the rerun imports that
+        batch a second time.
+        """
+        with open(f'{path}.tmp', 'w') as checkpoint:
+            json.dump({'email': email, 'records': records}, checkpoint)
+        os.replace(f'{path}.tmp', path)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        email, path = options['email'], options['path']
+        try:
+            user = get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {email}')
+
+        input_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.')
+        if input_format not in READERS:
+            raise CommandError(
+                f'Unknown format {input_format!r}, use --format'
+            )
+
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        done = self.read_checkpoint(checkpoint, email)
+        if done:
+            self.stdout.write(f'Resuming after {done} records')
+
+        importer = RecipeImporter(user)
+        imported = 0
+        start = time.perf_counter()
+        with open(path, newline='') as lines:
+            records = islice(READERS[input_format](lines), done, None)
+            while True:
+                try:
+                    batch = list(islice(records, options['batch_size']))
+                except RecipeReadError as error:
+                    raise CommandError(
+                        f'{path}: {error}; fix it and rerun to resume after '
+                        f'record {done}'
+                    )
+                if not batch:
+                    break
+
+                try:
+                    imported += importer.import_batch(batch, done + 1)
+                except RecipeImportError as error:
+                    raise CommandError(
+                        f'{error}; rerun to resume after record {done}'
+                    )
+                done += len(batch)
+                self.write_checkpoint(checkpoint, email, done)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{done} records imported, '
+                    f'{imported / elapsed:.0f} rows/s'
+                )
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes in '
+            f'{time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,148 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from recipe.async_views import async_view
+from recipe.management.commands.benchmark import seed_recipes
+from recipe.views import RecipeViewSet, TagViewSet
+
+
+VIEWS = {
+    'recipes': (RecipeViewSet, {'page_size': 20}),
+    'tags': (TagViewSet, {}),
+}
+
+
+class Command(BaseCommand):
+    """Django command to compare WSGI and ASGI throughput of list views"""
+    help = (
+        'Serve concurrent slow clients from a WSGI style thread pool and '
+        'from async views on one event loop, and report the throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('view', choices=sorted(VIEWS))
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=100,
+            help='Clients sending requests at the same time'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Threads of the WSGI server'
+        )
+        parser.add_argument(
+            '--client-delay',
+            type=float,
+            default=0.05,
+            help='Seconds each client takes to send its request'
+        )
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--attrs', type=int, default=50)
+        parser.add_argument('--per-recipe', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        # Requests are served on other threads, which only see committed
+        # rows, so the dataset is committed and deleted afterwards
+        user = get_user_model().objects.create_user(
+            f'load-benchmark-{time.time_ns()}@example.com'
+        )
+        try:
+            seed_recipes(
+                user,
+                options['recipes'],
+                options['attrs'],
+                options['per_recipe'],
+                random.Random(options['seed'])
+            )
+            token = Token.objects.create(user=user)
+            viewset, params = VIEWS[options['view']]
+            view = viewset.as_view({'get': 'list'})
+            factory = APIRequestFactory()
+
+            def make_request():
+                return factory.get(
+                    '/',
+                    params,
+                    HTTP_AUTHORIZATION=f'Token {token.key}',
+                    SERVER_NAME='localhost'
+                )
+
+            self.report('wsgi', options, self.run_wsgi(
+                view, make_request, options
+            ))
+            self.report('asgi', options, asyncio.run(self.run_asgi(
+                async_view(view), make_request, options
+            )))
+        finally:
+            user.delete()
+
+    def run_wsgi(self, view, make_request, options):
+        """Serve the clients from a fixed pool of server threads
+
+        A server thread is held for the whole request, including the time
+        the client takes to send it. Connections are closed after each
+        request, as Django's request_finished handler does.
+        """
+        server_threads = threading.BoundedSemaphore(options['workers'])
+
+        def serve(_):
+            start = time.perf_counter()
+            with server_threads:
+                time.sleep(options['client_delay'])
+                try:
+                    view(make_request()).render()
+                finally:
+                    close_old_connections()
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            start = time.perf_counter()
+            latencies = list(pool.map(serve, range(options['requests'])))
+
+        return time.perf_counter() - start, latencies
+
+    async def run_asgi(self, view, make_request, options):
+        """Serve the clients from async views on one event loop"""
+        slots = asyncio.Semaphore(options['concurrency'])
+
+        async def serve():
+            async with slots:
+                start = time.perf_counter()
+                await asyncio.sleep(options['client_delay'])
+                await view(make_request())
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(serve() for _ in range(options['requests']))
+        )
+
+        return time.perf_counter() - start, latencies
+
+    def report(self, label, options, result):
+        """Print the throughput and latency of a run"""
+        elapsed, latencies = result
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+        self.stdout.write(
+            f'{label:<6} {options["requests"] / elapsed:9.1f} req/s'
+            f'  p50 {statistics.median(latencies) * 1000:8.2f} ms'
+            f'  p95 {p95 * 1000:8.2f} ms'
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipe.models import Recipe
+from recipe.renditions import render_recipe_image, STATUS_PENDING, \
+    STATUS_FAILED
+
+
+class Command(BaseCommand):
+    """Django command to render recipe image renditions left pending"""
+    help = 'Render the renditions of recipe images not rendered yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--failed',
+            action='store_true',
+            help='Also retry images whose rendering failed'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        statuses = ['', STATUS_PENDING]
+        if options['failed']:
+            statuses.append(STATUS_FAILED)
+
+        recipe_ids = Recipe.objects.filter(
+            ~Q(image='') & Q(image__isnull=False),
+            image_status__in=statuses
+        ).values_list('id', flat=True)
+
+        count = 0
+        for recipe_id in recipe_ids.iterator():
+            render_recipe_image(recipe_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {count} images'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipe.counts import refresh_usage_counts, stale_usage_counts
+from recipe.models import Tag, Ingredient
+
+
+class Command(BaseCommand):
+    """Django command to fix the recipe counts of tags and ingredients"""
+    help = 'Recount the recipes using tags and ingredients where it drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the rows with a wrong count'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        for model in (Tag, Ingredient):
+            ids = list(stale_usage_counts(model).values_list('id', flat=True))
+            if not options['dry_run']:
+                refresh_usage_counts(model, ids, touch=True)
+
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{len(ids)} wrong counts'
+                f'{"" if options["dry_run"] else " repaired"}'
+            )
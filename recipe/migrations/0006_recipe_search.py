@@ -0,0 +1,90 @@
+# Generated by Django 3.1.4 on 2026-10-18 00:23
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copies of the recipe.search helpers as of this migration
+SEARCH_CONFIG = 'english'
+TERM_RE = re.compile(r'\w+')
+
+
+def build_document(title, names):
+    return ' '.join([title, *names]).lower()
+
+
+def document_terms(document):
+    return Counter(TERM_RE.findall(document.lower()))
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_document_idx ON recipe_recipe '
+            f"USING GIN (to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+            'search_document));'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX recipe_search_document_idx;')
+
+
+def build_search_documents(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    RecipeSearchTerm = apps.get_model('recipe', 'RecipeSearchTerm')
+    using = schema_editor.connection.alias
+    full_text = schema_editor.connection.vendor == 'postgresql'
+
+    recipes = Recipe.objects.using(using).prefetch_related(
+        'tags', 'ingredients'
+    )
+    for recipe in recipes:
+        names = [tag.name for tag in recipe.tags.all()]
+        names += [ingredient.name for ingredient in recipe.ingredients.all()]
+        document = build_document(recipe.title, names)
+        Recipe.objects.using(using).filter(pk=recipe.pk).update(
+            search_document=document
+        )
+        if not full_text:
+            RecipeSearchTerm.objects.using(using).bulk_create(
+                RecipeSearchTerm(recipe=recipe, term=term, weight=weight)
+                for term, weight in document_terms(document).items()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RecipeSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='recipe.recipe')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='recipesearchterm',
+            index=models.Index(fields=['term', 'recipe'], name='search_term_recipe_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(
+            build_search_documents,
+            migrations.RunPython.noop
+        ),
+    ]
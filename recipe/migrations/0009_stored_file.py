@@ -0,0 +1,28 @@
+# Generated by Django 3.1.4 on 2026-10-18 00:31
+
+from django.db import migrations, models
+import recipe.models
+import recipe.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0008_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('references', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=recipe.storage.recipe_image_storage, upload_to=recipe.models.recipe_image_file_path),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.1.4 on 2026-10-18 00:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_usage(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    using = schema_editor.connection.alias
+
+    for name in ('Tag', 'Ingredient'):
+        model = apps.get_model('recipe', name)
+        field = f'{model._meta.model_name}_id'
+        through = getattr(Recipe, f'{model._meta.model_name}s').through
+        count = Coalesce(Subquery(
+            through.objects.using(using).filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('*')
+            ).values('count')
+        ), 0)
+        model.objects.using(using).update(recipe_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_stored_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(condition=models.Q(recipe_count__gt=0), fields=['user', 'name'], name='ingredient_user_assigned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(condition=models.Q(recipe_count__gt=0), fields=['user', 'name'], name='tag_user_assigned_idx'),
+        ),
+        migrations.RunPython(count_usage, migrations.RunPython.noop),
+    ]
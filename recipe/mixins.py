@@ -0,0 +1,167 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from recipe.cache import list_cache_key, get_cached_list, \
+    set_cached_list, lists_cached
+
+
+class CachedListMixin:
+    """ Serve list responses from a per-user cache """
+
+    def list(self, request, *args, **kwargs):
+        """ Return the list, from the per-user cache when possible """
+        if not lists_cached():
+            return super().list(request, *args, **kwargs)
+
+        key = list_cache_key(
+            self.queryset.model,
+            request.user.pk,
+            request.build_absolute_uri()
+        )
+        data = get_cached_list(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        set_cached_list(key, response.data)
+
+        return response
+
+
+class SparseFieldsMixin:
+    """ Trim read responses to the fields a client asks for
+
+    ``?fields=`` names the fields to keep and ``?omit=`` the fields to
+    drop, comma separated. Serializers of the read actions are built
+    with only those fields, and querysets should neither select nor
+    prefetch the others.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    @cached_property
+    def sparse_fields(self):
+        """ Return the names of the requested fields, None for all """
+        params = self.request.query_params
+        if self.action not in self.sparse_actions or not (
+            'fields' in params or 'omit' in params
+        ):
+            return None
+
+        available = self.serializer_class.Meta.fields
+        fields = list(available)
+        for param in ('fields', 'omit'):
+            if param not in params:
+                continue
+            names = {name for name in params[param].split(',') if name}
+            unknown = names.difference(available)
+            if unknown:
+                raise ValidationError(
+                    {param: [f'Unknown fields: {", ".join(sorted(unknown))}']}
+                )
+            fields = [
+                name for name in fields
+                if (name in names) == (param == 'fields')
+            ]
+
+        return tuple(fields)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.sparse_fields is not None:
+            kwargs.setdefault('fields', self.sparse_fields)
+
+        return super().get_serializer(*args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """ Answer conditional GETs from updated_at without serializing """
+
+    def _etag(self, *parts):
+        """ Return a quoted ETag for the user, media type and parts """
+        value = ':'.join(
+            str(part) for part in (
+                self.request.user.pk,
+                self.request.accepted_media_type,
+                *parts
+            )
+        )
+
+        return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+    def _conditional_response(self, etag, last_modified=None, respond=None):
+        """ Return a 304 when the client copy is current, else respond() """
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=timestamp
+        )
+        if response is None:
+            response = respond()
+
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """ Answer conditional list requests
+
+    Lists only get an ETag, built from the row count and the latest
+    update, since deleting a row does not move the latest update.
+    """
+
+    def list_state(self):
+        """ Return values that change whenever the list does """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        return queryset.order_by().aggregate(
+            count=Count('pk'),
+            updated_at=Max('updated_at')
+        ).values()
+
+    def list(self, request, *args, **kwargs):
+        """ Return the list, or a 304 if it did not change """
+        state = self.list_state()
+
+        def respond():
+            return super(ConditionalListMixin, self).list(
+                request, *args, **kwargs
+            )
+
+        return self._conditional_response(
+            self._etag(request.get_full_path(), *state),
+            respond=respond
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """ Answer conditional detail requests with ETag and Last-Modified """
+
+    def retrieve(self, request, *args, **kwargs):
+        """ Return the object, or a 304 if it did not change """
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        updated_at = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup]}
+        ).prefetch_related(None).values_list('updated_at', flat=True).first()
+
+        def respond():
+            return super(ConditionalRetrieveMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+
+        if updated_at is None:
+            return respond()
+
+        return self._conditional_response(
+            self._etag(request.get_full_path(), updated_at.isoformat()),
+            last_modified=updated_at,
+            respond=respond
+        )
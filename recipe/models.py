@@ -4,6 +4,9 @@ import os
 from django.db import models
 from django.conf import settings
 
+from recipe import renditions
+from recipe.storage import recipe_image_storage
+
 def recipe_image_file_path(instance, filename):
     """ Generate file path for new recipe """
     ext = filename.split('.')[-1]
@@ -12,25 +15,65 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads/recipe/', filename)
 
 
-class Tag(models.Model):
+class UsageCountMixin:
+    """ Keep the signal maintained recipe count out of instance saves """
+
+    def save(self, *args, **kwargs):
+        """ Save every field but a possibly stale recipe count """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'recipe_count'
+            ]
+        super().save(*args, **kwargs)
+
+
+class Tag(UsageCountMixin, models.Model):
     """Tag to be used for a recipe"""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name'], name='tag_user_name_idx'),
+            models.Index(
+                fields=['user', 'name'],
+                condition=models.Q(recipe_count__gt=0),
+                name='tag_user_assigned_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(UsageCountMixin, models.Model):
     """Ingredient to be used for a recipe"""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name'],
+                name='ingredient_user_name_idx'
+            ),
+            models.Index(
+                fields=['user', 'name'],
+                condition=models.Q(recipe_count__gt=0),
+                name='ingredient_user_assigned_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -48,7 +91,60 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage
+    )
+    image_status = models.CharField(
+        max_length=10,
+        blank=True,
+        editable=False,
+        choices=[
+            (renditions.STATUS_PENDING, 'Pending'),
+            (renditions.STATUS_READY, 'Ready'),
+            (renditions.STATUS_FAILED, 'Failed'),
+        ]
+    )
+    image_renditions = models.JSONField(default=dict, editable=False)
+    search_document = models.TextField(blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeSearchTerm(models.Model):
+    """ Word of a recipe search document, for databases without full text """
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    term = models.CharField(max_length=255)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['term', 'recipe'],
+                name='search_term_recipe_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class StoredFile(models.Model):
+    """ Reference count of a file shared through content addressing """
+    name = models.CharField(max_length=255, unique=True)
+    references = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """ Keyset pagination for recipes, newest first
+
+    Pagination is opt-in: lists stay unpaginated unless the client asks
+    for a ``page_size``. Cursors are opaque and carry the last seen key,
+    so pages stay stable when rows are inserted between requests.
+    """
+    ordering = ('-id',)
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        """ Keep search results in rank order """
+        if 'rank' in queryset.query.annotations:
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeAttrCursorPagination(RecipeCursorPagination):
+    """ Keyset pagination for tags and ingredients, by name """
+    ordering = ('-name', '-id')
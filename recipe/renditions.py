@@ -0,0 +1,119 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipe.storage import release_files
+
+
+RENDITIONS = {
+    'thumbnail': (150, 150),
+    'card': (600, 400),
+    'full': (1600, 1600),
+}
+
+STATUS_PENDING = 'pending'
+STATUS_READY = 'ready'
+STATUS_FAILED = 'failed'
+
+WORKERS = getattr(settings, 'RECIPE_RENDITION_WORKERS', 2)
+QUEUE_SIZE = getattr(settings, 'RECIPE_RENDITION_QUEUE_SIZE', 100)
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(QUEUE_SIZE)
+
+
+def rendition_path(image_name, rendition):
+    """ Return the storage path of a rendition of an image """
+    base, _ = os.path.splitext(image_name)
+    return f'{base}-{rendition}.jpg'
+
+
+def render_recipe_image(recipe_id):
+    """ Generate the renditions of a recipe image and record them
+
+    The result is only recorded if the recipe still holds the same
+    image, so a newer upload is never overwritten by an older one.
+    """
+    from recipe.models import Recipe
+
+    recipe = Recipe.objects.filter(pk=recipe_id).only('id', 'image').first()
+    if recipe is None or not recipe.image:
+        return
+
+    name = recipe.image.name
+    storage = recipe.image.storage
+    paths = {}
+    try:
+        with recipe.image.open('rb') as image_file:
+            original = Image.open(image_file)
+            original = original.convert('RGB')
+
+        for rendition, size in RENDITIONS.items():
+            image = original.copy()
+            image.thumbnail(size)
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=85)
+            paths[rendition] = storage.save(
+                rendition_path(name, rendition),
+                ContentFile(buffer.getvalue())
+            )
+        image_status = STATUS_READY
+    except Exception:
+        # Pillow raises more than OSError on broken or hostile files, such
+        # as DecompressionBombError, and the recipe must not stay pending
+        release_files(storage, paths.values())
+        paths, image_status = {}, STATUS_FAILED
+
+    recorded = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_status=image_status,
+        image_renditions=paths,
+        updated_at=timezone.now()
+    )
+    if not recorded:
+        release_files(storage, paths.values())
+
+
+def _get_executor():
+    """ Return the shared rendition worker pool, starting it if needed """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS,
+                thread_name_prefix='recipe-renditions'
+            )
+
+    return _executor
+
+
+def _render_in_worker(recipe_id):
+    """ Render a recipe image on a worker thread """
+    try:
+        render_recipe_image(recipe_id)
+    finally:
+        _slots.release()
+        connections.close_all()
+
+
+def _submit(recipe_id):
+    """ Queue a rendering job unless the queue is full
+
+    Rejected jobs leave the recipe pending for the render_recipe_images
+    command to pick up.
+    """
+    if _slots.acquire(blocking=False):
+        _get_executor().submit(_render_in_worker, recipe_id)
+
+
+def enqueue_renditions(recipe_id):
+    """ Render the renditions of a recipe image off the request path """
+    transaction.on_commit(lambda: _submit(recipe_id))
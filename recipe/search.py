@@ -0,0 +1,109 @@
+import re
+from collections import Counter
+
+from django.db import connections
+from django.db.models import BooleanField, Count, F, FloatField, Func, \
+    Sum, TextField, Value
+from django.db.models.functions import Cast
+
+
+SEARCH_CONFIG = 'english'
+TERM_RE = re.compile(r'\w+')
+
+
+class DocumentVector(Func):
+    """ The tsvector of a search document, as indexed on PostgreSQL """
+    template = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, %(expressions)s)"
+    output_field = TextField()
+
+
+class PlainQuery(Func):
+    """ A tsquery built from plain user text """
+    template = (
+        f"plainto_tsquery('{SEARCH_CONFIG}'::regconfig, %(expressions)s)"
+    )
+    output_field = TextField()
+
+
+class Matches(Func):
+    """ Whether a tsvector matches a tsquery """
+    arg_joiner = ' @@ '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+
+class Rank(Func):
+    """ How well a tsvector matches a tsquery """
+    function = 'ts_rank'
+    output_field = FloatField()
+
+
+def build_document(title, names):
+    """ Return the searchable text of a recipe """
+    return ' '.join([title, *names]).lower()
+
+
+def document_terms(document):
+    """ Return the words of a search document with their occurrences """
+    return Counter(TERM_RE.findall(document.lower()))
+
+
+def uses_full_text(using):
+    """ Return whether a database has native full text search """
+    return connections[using].vendor == 'postgresql'
+
+
+def build_search_terms(recipe):
+    """ Return the unsaved search term rows of a recipe """
+    from recipe.models import RecipeSearchTerm
+
+    return [
+        RecipeSearchTerm(recipe=recipe, term=term, weight=weight)
+        for term, weight in document_terms(recipe.search_document).items()
+    ]
+
+
+def refresh_search_documents(recipe_ids):
+    """ Rebuild the search documents of the given recipes """
+    from recipe.models import Recipe, RecipeSearchTerm
+
+    recipes = Recipe.objects.filter(pk__in=recipe_ids).only(
+        'id', 'title'
+    ).prefetch_related('tags', 'ingredients')
+
+    for recipe in recipes:
+        names = [tag.name for tag in recipe.tags.all()]
+        names += [ingredient.name for ingredient in recipe.ingredients.all()]
+        recipe.search_document = build_document(recipe.title, names)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            search_document=recipe.search_document
+        )
+
+        if not uses_full_text(recipes.db):
+            RecipeSearchTerm.objects.filter(recipe=recipe).delete()
+            RecipeSearchTerm.objects.bulk_create(build_search_terms(recipe))
+
+
+def search_recipes(queryset, query):
+    """ Filter recipes matching a search query, annotated with a rank
+
+    PostgreSQL matches against the GIN indexed tsvector of the search
+    document. Other databases fall back to exact word lookups in the
+    indexed search terms table, requiring every word of the query and
+    ranking by how often those words occur.
+    """
+    if uses_full_text(queryset.db):
+        vector = DocumentVector(F('search_document'))
+        tsquery = PlainQuery(Value(query, output_field=TextField()))
+        return queryset.filter(Matches(vector, tsquery)).annotate(
+            rank=Cast(Rank(vector, tsquery), FloatField())
+        )
+
+    terms = set(document_terms(query))
+    if not terms:
+        return queryset.none()
+
+    return queryset.filter(search_terms__term__in=terms).annotate(
+        matched_terms=Count('search_terms'),
+        rank=Sum('search_terms__weight')
+    ).filter(matched_terms=len(terms))
@@ -1,27 +1,91 @@
 from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+from rest_framework.utils.serializer_helpers import ReturnList
 
 from recipe.models import Tag, Ingredient, Recipe
+from recipe.renditions import STATUS_PENDING
+from recipe.storage import release_files
 
 
-class TagSerializer(serializers.ModelSerializer):
+class RenditionsField(serializers.Field):
+    """ Read only field exposing the URLs of image renditions """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        storage = Recipe._meta.get_field('image').storage
+        request = self.context.get('request')
+        urls = {}
+        for rendition, path in value.items():
+            url = storage.url(path)
+            urls[rendition] = request.build_absolute_uri(url) \
+                if request else url
+
+        return urls
+
+
+class SparseFieldsMixin:
+    """ Let a serializer be built with only some of its fields """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        self.only_fields = fields
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.only_fields is None:
+            return fields
+
+        return {
+            name: field for name, field in fields.items()
+            if name in self.only_fields
+        }
+
+    def sources(self):
+        """ Return the model columns and the relations the fields read """
+        columns, relations = [], []
+        for field in self.fields.values():
+            if isinstance(
+                field,
+                (ManyRelatedField, serializers.ListSerializer)
+            ):
+                relations.append(field.source)
+            else:
+                columns.append(field.source)
+
+        return columns, relations
+
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for tag object"""
 
     class Meta:
         model = Tag
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """ Serializer for ingredient object """
 
     class Meta:
         model = Ingredient
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class BulkNamesSerializer(serializers.Serializer):
+    """ Serializer for a list of tag or ingredient names """
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """ Serializer for recipe object """
     ingredients = serializers.PrimaryKeyRelatedField(
         many=True,
@@ -31,6 +95,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True,
         queryset=Tag.objects.all()
     )
+    image_renditions = RenditionsField()
 
     class Meta:
         model = Recipe
@@ -42,10 +107,167 @@ class RecipeSerializer(serializers.ModelSerializer):
             'price',
             'ingredients',
             'tags',
+            'image_status',
+            'image_renditions',
         )
         read_only_Fields = ('id',)
 
 
+class IdentityMap:
+    """ Serialized objects of one request, each loaded at most once """
+
+    def __init__(self):
+        self._objects = {}
+
+    def get_many(self, values_serializer_class, pks):
+        """ Return the serialized objects of pks, by pk """
+        model = values_serializer_class.serializer_class.Meta.model
+        objects = self._objects.setdefault(model, {})
+        missing = set(pks).difference(objects)
+        if missing:
+            queryset = values_serializer_class.values(
+                model.objects.filter(pk__in=missing)
+            )
+            for item in values_serializer_class(queryset).data:
+                objects[item['id']] = item
+
+        return {pk: objects[pk] for pk in pks}
+
+
+class ValuesListSerializer:
+    """ Read only serializer of many rows fetched with values()
+
+    Emits exactly what ``serializer_class`` does with many=True, reusing
+    its fields on plain column values instead of model instances. Many
+    relations become lists of ids read from their through tables, in one
+    query per relation.
+
+    Relations named in the ``expand`` context embed their objects instead,
+    loaded through the ``identity_map`` of the context in one more query.
+    """
+    serializer_class = None
+    expandable = {}
+
+    def __init__(self, instance=None, many=True, context=None, fields=None,
+                 **kwargs):
+        self.instance = instance
+        self.context = context or {}
+        self.only_fields = fields
+
+    @classmethod
+    def values(cls, queryset, fields=None):
+        """ Return a queryset of the rows this serializer reads
+
+        Rows always carry the id, the annotations and the ordering keys,
+        which related ids and cursor pagination rely on.
+        """
+        columns, _ = cls.serializer_class(fields=fields).sources()
+        keys = [
+            name.lstrip('-') for name in queryset.query.order_by
+            if isinstance(name, str)
+        ]
+        names = []
+        for name in ('id', *columns, *queryset.query.annotations, *keys):
+            if name not in names:
+                names.append(name)
+
+        return queryset.values(*names)
+
+    def _related_ids(self, name, pks):
+        """ Return the ids related to each row through a many relation """
+        field = self.serializer_class.Meta.model._meta.get_field(name)
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        related = {pk: [] for pk in pks}
+        links = field.remote_field.through.objects.filter(
+            **{f'{source}__in': pks}
+        ).order_by('pk').values_list(source, target)
+        for pk, related_pk in links:
+            related[pk].append(related_pk)
+
+        return related
+
+    def _expand(self, name, related):
+        """ Replace related ids by their serialized objects """
+        identity_map = self.context.get('identity_map') or IdentityMap()
+        objects = identity_map.get_many(
+            self.expandable[name],
+            {pk for pks in related.values() for pk in pks}
+        )
+
+        return {
+            pk: [objects[related_pk] for related_pk in related_pks]
+            for pk, related_pks in related.items()
+        }
+
+    @property
+    def data(self):
+        fields = self.serializer_class(
+            context=self.context,
+            fields=self.only_fields
+        ).fields
+        rows = list(self.instance)
+        pks = [row['id'] for row in rows]
+
+        columns = []
+        for name, field in fields.items():
+            if isinstance(field, ManyRelatedField):
+                related = self._related_ids(field.source, pks)
+                if name in self.context.get('expand', ()):
+                    related = self._expand(name, related)
+                columns.append((name, 'id', related.__getitem__))
+            else:
+                columns.append((name, field.source, field.to_representation))
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, to_representation in columns:
+                value = row[source]
+                item[name] = None if value is None \
+                    else to_representation(value)
+            data.append(item)
+
+        return ReturnList(data, serializer=self)
+
+
+class TagValuesSerializer(ValuesListSerializer):
+    """ Fast read only serializer of tag lists """
+    serializer_class = TagSerializer
+
+
+class IngredientValuesSerializer(ValuesListSerializer):
+    """ Fast read only serializer of ingredient lists """
+    serializer_class = IngredientSerializer
+
+
+class RecipeValuesSerializer(ValuesListSerializer):
+    """ Fast read only serializer of recipe lists """
+    serializer_class = RecipeSerializer
+    expandable = {
+        'tags': TagValuesSerializer,
+        'ingredients': IngredientValuesSerializer,
+    }
+
+
+class RecipeBulkItemSerializer(serializers.ModelSerializer):
+    """ Serializer for one recipe of a bulk create, checking ids later """
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = RecipeSerializer.Meta.fields
+        read_only_fields = ('id',)
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """ Serialize a recipe detail """
     ingredients = IngredientSerializer(many=True, read_only=True)
@@ -54,8 +276,19 @@ class RecipeDetailSerializer(RecipeSerializer):
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """ Serializer for uploading images to recipes """
+    image_renditions = RenditionsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_status', 'image_renditions')
         read_only_fields = ('id', )
+
+    def update(self, instance, validated_data):
+        """ Store a new image, its renditions to be rendered later """
+        previous = [instance.image.name, *instance.image_renditions.values()]
+        instance.image_status = STATUS_PENDING
+        instance.image_renditions = {}
+        instance = super().update(instance, validated_data)
+        release_files(instance.image.storage, previous)
+
+        return instance
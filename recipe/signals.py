@@ -0,0 +1,171 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from recipe.cache import invalidate_lists
+from recipe.counts import refresh_usage_counts
+from recipe.models import Tag, Ingredient, Recipe, RecipeSearchTerm
+from recipe.search import refresh_search_documents
+from recipe.storage import release_files
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """ Rebuild the search document of a saved recipe """
+    if raw or (update_fields and 'title' not in update_fields):
+        return
+
+    refresh_search_documents([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_search_terms_dropped(sender, instance, **kwargs):
+    """ Drop search terms rebuilt while the recipe was being deleted
+
+    Deleting a user deletes their recipes' terms first, then tags whose
+    deletion rebuilds the terms of recipes not deleted yet.
+    """
+    RecipeSearchTerm.objects.filter(recipe_id=instance.pk).delete()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """ Rebuild the search documents of recipes gaining or losing names """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_search_documents([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_search_documents(instance._cleared_recipe_ids)
+    elif action in ('post_add', 'post_remove'):
+        refresh_search_documents(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def recipe_attr_saved(sender, instance, created, raw=False, **kwargs):
+    """ Rebuild the search documents of recipes using a renamed attr """
+    if raw or created:
+        return
+
+    refresh_search_documents(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+    instance.recipe_set.update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_attr_deleting(sender, instance, **kwargs):
+    """ Remember the recipes using an attr before its links are deleted """
+    instance._deleted_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_attr_deleted(sender, instance, **kwargs):
+    """ Rebuild the search documents of recipes that used a deleted attr """
+    refresh_search_documents(instance._deleted_recipe_ids)
+    Recipe.objects.filter(pk__in=instance._deleted_recipe_ids).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_attr_changed(sender, instance, raw=False, **kwargs):
+    """ Invalidate the cached lists of the owner of a changed attr """
+    if not raw:
+        invalidate_lists(sender, instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_files_released(sender, instance, **kwargs):
+    """ Release the image files of a deleted recipe """
+    release_files(
+        instance.image.storage,
+        [instance.image.name, *instance.image_renditions.values()]
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """ Invalidate cached attr lists whose assigned_only filter changed """
+    invalidate_lists(Tag, instance.user_id)
+    invalidate_lists(Ingredient, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_attrs_assigned(sender, instance, action, reverse, model,
+                          **kwargs):
+    """ Invalidate cached attr lists whose assigned_only filter changed """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_lists(
+            type(instance) if reverse else model,
+            instance.user_id
+        )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_touched(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """ Bump updated_at on both sides of changed recipe links """
+    now = timezone.now()
+    if action == 'pre_clear':
+        if reverse:
+            instance.recipe_set.update(updated_at=now)
+        else:
+            model.objects.filter(recipe=instance).update(updated_at=now)
+    elif action in ('post_add', 'post_remove'):
+        model.objects.filter(pk__in=pk_set).update(updated_at=now)
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        type(instance).objects.filter(pk=instance.pk).update(updated_at=now)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_usage_counted(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """ Recount the recipes of tags and ingredients linked or unlinked """
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_usage_counts(type(instance), [instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_attr_ids = list(
+            model.objects.filter(recipe=instance).values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_usage_counts(model, instance._cleared_attr_ids)
+    elif action in ('post_add', 'post_remove'):
+        refresh_usage_counts(model, pk_set)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    """ Remember the attrs used by a recipe before its links are deleted """
+    instance._used_attr_ids = {
+        model: list(
+            model.objects.filter(recipe=instance).values_list('id', flat=True)
+        )
+        for model in (Tag, Ingredient)
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_usage_released(sender, instance, **kwargs):
+    """ Recount the recipes of the attrs a deleted recipe used """
+    for model, ids in instance._used_attr_ids.items():
+        refresh_usage_counts(model, ids, touch=True)
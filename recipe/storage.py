@@ -0,0 +1,127 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, get_storage_class
+from django.db import transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """ File storage naming files by the SHA-256 of their content
+
+    Files are fanned out over two levels of hash prefix directories and
+    identical uploads share one file. Every save takes a reference on
+    the file and every delete releases one; the file is only removed
+    once its last reference is released.
+    """
+
+    def __init__(self, prefix='uploads/recipe/', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    def get_available_name(self, name, max_length=None):
+        """ Keep the name: the final one only depends on the content """
+        return name
+
+    def _save(self, name, content):
+        """ Stream content to disk while hashing it, then file it by hash """
+        ext = os.path.splitext(name)[1].lower()
+        tmp_dir = os.path.join(self.location, self.prefix, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                os.remove(tmp.name)
+                raise
+
+        digest = digest.hexdigest()
+        name = f'{self.prefix}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+        self._acquire(name, tmp.name)
+
+        return name
+
+    def _acquire(self, name, tmp_name):
+        """ Take a reference on a stored file, filing the upload if needed
+
+        The file is only checked and moved into place while its reference
+        count row is locked, so a concurrent release of the last reference
+        cannot remove it in between.
+        """
+        from recipe.models import StoredFile
+
+        while True:
+            with transaction.atomic():
+                StoredFile.objects.get_or_create(name=name)
+                stored = StoredFile.objects.select_for_update().filter(
+                    name=name
+                ).first()
+                if stored is None:
+                    # Removed by the last release we waited for, retry
+                    continue
+
+                path = self.path(name)
+                if os.path.exists(path):
+                    os.remove(tmp_name)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_name, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+
+                stored.references = F('references') + 1
+                stored.save(update_fields=['references'])
+                return
+
+    def delete(self, name):
+        """ Release a reference, removing the file with the last one """
+        from recipe.models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if stored is not None and stored.references > 0:
+                stored.references -= 1
+                stored.save(update_fields=['references'])
+                if stored.references > 0:
+                    return
+
+            transaction.on_commit(lambda: self._remove(name))
+
+    def _remove(self, name):
+        """ Remove a file unless it was referenced again meanwhile """
+        from recipe.models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if stored is not None:
+                if stored.references > 0:
+                    return
+                stored.delete()
+
+            super().delete(name)
+
+
+def recipe_image_storage():
+    """ Return the storage for recipe images selected in the settings """
+    if getattr(settings, 'RECIPE_IMAGE_STORAGE', None) == 'content':
+        return ContentAddressedStorage()
+
+    return get_storage_class()()
+
+
+def release_files(storage, names):
+    """ Release files of a content addressed storage no longer used """
+    if isinstance(storage, ContentAddressedStorage):
+        for name in names:
+            if name:
+                storage.delete(name)
@@ -9,6 +9,7 @@ from recipe.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+BULK_INGREDIENTS_URL = reverse('recipe:ingredient-bulk-get-or-create')
 
 
 @pytest.fixture
@@ -124,6 +125,7 @@ class TestPrivateIngredientsApi:
 
         recipe = Recipe.objects.create(user=auto_login_user, **payload)
         recipe.ingredients.add(ingredient1)
+        ingredient1.refresh_from_db()
 
         res = api_client.get(INGREDIENTS_URL, {'assigned_only': 1})
         serializer1 = IngredientSerializer(ingredient1)
@@ -152,3 +154,26 @@ class TestPrivateIngredientsApi:
 
         assert len(res.data) == 1
 
+    def test_bulk_get_or_create_ingredients(self, auto_login_user,
+                                            api_client):
+        """ Test getting ids for names, creating only the missing ones """
+        kale = Ingredient.objects.create(user=auto_login_user, name='Kale')
+        api_client.get(INGREDIENTS_URL)
+        payload = {'names': ['Kale', 'Salt', 'Pepper', 'Salt']}
+
+        res = api_client.post(BULK_INGREDIENTS_URL, payload, format='json')
+
+        assert res.status_code == status.HTTP_200_OK
+        assert list(res.data) == ['Kale', 'Salt', 'Pepper']
+        assert res.data['Kale'] == kale.id
+        assert Ingredient.objects.get(name='Salt').id == res.data['Salt']
+        assert Ingredient.objects.filter(user=auto_login_user).count() == 3
+        assert len(api_client.get(INGREDIENTS_URL).data) == 3
+
+    def test_bulk_get_or_create_invalid(self, auto_login_user, api_client):
+        """ Test bulk get or create needs a list of names """
+        res = api_client.post(
+            BULK_INGREDIENTS_URL, {'names': []}, format='json')
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
@@ -1,7 +1,10 @@
+import json
 import tempfile
 import os
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -9,10 +12,16 @@ from unittest.mock import patch
 from PIL import Image
 
 
-from recipe.models import Recipe, Tag, Ingredient, recipe_image_file_path
-from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.export import export_recipes
+from recipe.models import Recipe, RecipeSearchTerm, Tag, Ingredient, \
+    recipe_image_file_path
+from recipe.renditions import render_recipe_image, RENDITIONS
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer, \
+    TagSerializer
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_RECIPES_URL = reverse('recipe:recipe-bulk-create')
+EXPORT_RECIPES_URL = reverse('recipe:recipe-export')
 
 
 def detail_url(recipe_id):
@@ -107,6 +116,34 @@ class TestPrivateRecipeApi:
         assert res.status_code == status.HTTP_200_OK
         assert res.data == serializer.data
 
+    def test_retrieve_recipes_query_count(self, auto_login_user, api_client):
+        """ Test listing recipes costs the same queries for any row count """
+        payload = {
+            'title': 'Sample Recipe',
+            'time_minutes': 10,
+            'price': 5.00
+        }
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        ingredient = Ingredient.objects.create(
+            user=auto_login_user, name='Kale')
+
+        def add_recipes(count):
+            for _ in range(count):
+                recipe = Recipe.objects.create(user=auto_login_user, **payload)
+                recipe.tags.add(tag)
+                recipe.ingredients.add(ingredient)
+
+        add_recipes(2)
+        with CaptureQueriesContext(connection) as small:
+            api_client.get(RECIPES_URL)
+
+        add_recipes(10)
+        with CaptureQueriesContext(connection) as large:
+            res = api_client.get(RECIPES_URL)
+
+        assert len(res.data) == 12
+        assert len(large.captured_queries) == len(small.captured_queries)
+
     def test_recipes_limited_to_user(self, auto_login_user, api_client):
         """ Test retrieving recipes for user """
         user2 = get_user_model().objects.create_user(
@@ -130,6 +167,31 @@ class TestPrivateRecipeApi:
         assert res.status_code == status.HTTP_200_OK
         assert res.data == serializer.data
 
+    def test_retrieve_recipes_paginated(self, auto_login_user, api_client):
+        """ Test recipes are paginated by cursor when a page size is given """
+        payload = {
+            'title': 'Sample Recipe',
+            'time_minutes': 10,
+            'price': 5.00
+        }
+        for _ in range(3):
+            Recipe.objects.create(user=auto_login_user, **payload)
+
+        res = api_client.get(RECIPES_URL, {'page_size': 2})
+        recipes = list(Recipe.objects.all().order_by('-id'))
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data['previous'] is None
+        assert res.data['results'] == RecipeSerializer(
+            recipes[:2], many=True).data
+
+        Recipe.objects.create(user=auto_login_user, **payload)
+        res = api_client.get(res.data['next'])
+
+        assert res.data['next'] is None
+        assert res.data['results'] == RecipeSerializer(
+            recipes[2:3], many=True).data
+
     def test_view_recipe_detail(self, auto_login_user, api_client):
         """ Test viewing a recipe detail """
         payload = {
@@ -154,6 +216,25 @@ class TestPrivateRecipeApi:
 
         assert res.data == serializer.data
 
+    def test_view_recipe_detail_query_count(self, auto_login_user,
+                                            api_client):
+        """ Test viewing a recipe detail loads each relation in one query """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        for name in ('Vegan', 'Dessert', 'Spicy'):
+            tag = Tag.objects.create(user=auto_login_user, name=name)
+            recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = api_client.get(detail_url(recipe.id))
+
+        assert len(res.data['tags']) == 3
+        assert len(ctx.captured_queries) == 4
+
     def test_create_basic_recipe(self, auto_login_user, api_client):
         """ Test creating recipe """
         payload = {
@@ -300,6 +381,103 @@ class TestRecipeImageUpload:
 
         recipe.image.delete()
 
+    def test_upload_image_renditions(self, auto_login_user, api_client):
+        """ Test renditions are rendered after an upload """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        url = image_upload_url(recipe.id)
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            img = Image.new('RGB', (2000, 1000))
+            img.save(ntf, format='JPEG')
+            ntf.seek(0)
+            with patch('recipe.views.enqueue_renditions') as enqueue:
+                res = api_client.post(
+                    url, {'image': ntf}, format='multipart')
+
+        enqueue.assert_called_once_with(recipe.id)
+        assert res.data['image_status'] == 'pending'
+        assert res.data['image_renditions'] == {}
+
+        render_recipe_image(recipe.id)
+        recipe.refresh_from_db()
+        res = api_client.get(detail_url(recipe.id))
+
+        assert res.data['image_status'] == 'ready'
+        assert set(res.data['image_renditions']) == set(RENDITIONS)
+        for name, path in recipe.image_renditions.items():
+            with Image.open(recipe.image.storage.path(path)) as rendition:
+                assert rendition.width <= RENDITIONS[name][0]
+            recipe.image.storage.delete(path)
+
+        recipe.image.delete()
+
+    @pytest.mark.parametrize('error', [
+        Image.DecompressionBombError('Image size exceeds limit'),
+        SyntaxError('broken PNG file'),
+    ])
+    def test_rendering_error_fails(self, auto_login_user, api_client, error):
+        """ Test any Pillow error marks the recipe image failed """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (200, 100)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            with patch('recipe.views.enqueue_renditions'):
+                api_client.post(
+                    image_upload_url(recipe.id),
+                    {'image': ntf},
+                    format='multipart'
+                )
+
+        with patch('recipe.renditions.Image.open', side_effect=error):
+            render_recipe_image(recipe.id)
+
+        recipe.refresh_from_db()
+        assert recipe.image_status == 'failed'
+        assert recipe.image_renditions == {}
+        recipe.image.delete()
+
+    def test_rendering_changes_etags(self, auto_login_user, api_client):
+        """ Test recipes stop answering 304 once renditions are ready """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (200, 100)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            with patch('recipe.views.enqueue_renditions'):
+                api_client.post(
+                    image_upload_url(recipe.id),
+                    {'image': ntf},
+                    format='multipart'
+                )
+        urls = [detail_url(recipe.id), RECIPES_URL]
+        etags = [api_client.get(url)['ETag'] for url in urls]
+
+        render_recipe_image(recipe.id)
+
+        for url, etag in zip(urls, etags):
+            res = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert res.status_code == status.HTTP_200_OK
+        assert res.data[0]['image_status'] == 'ready'
+
+        recipe.refresh_from_db()
+        for path in recipe.image_renditions.values():
+            recipe.image.storage.delete(path)
+        recipe.image.delete()
+
     def test_upload_image_bad_request(self, auto_login_user, api_client):
         """ Test upload an invalid image """
 
@@ -362,3 +540,510 @@ class TestRecipeImageUpload:
 
         assert serializer1.data in res.data
         assert serializer2.data not in res.data
+
+    def test_filter_recipes_by_tags_unique(self, auto_login_user, api_client):
+        """ Test filtering by several tags returns each recipe once """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        tag1 = Tag.objects.create(user=auto_login_user, name='Vegan')
+        tag2 = Tag.objects.create(user=auto_login_user, name='Spicy')
+        recipe.tags.add(tag1, tag2)
+
+        res = api_client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        assert len(res.data) == 1
+
+    def test_filter_recipes_by_all_tags(self, auto_login_user, api_client):
+        """ Test filtering recipes having every requested tag """
+        payload = {
+            'title': 'Sample Recipe',
+            'time_minutes': 10,
+            'price': 5.00
+        }
+
+        recipe1 = Recipe.objects.create(user=auto_login_user, **payload)
+        recipe2 = Recipe.objects.create(user=auto_login_user, **payload)
+        tag1 = Tag.objects.create(user=auto_login_user, name='Vegan')
+        tag2 = Tag.objects.create(user=auto_login_user, name='Spicy')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        res = api_client.get(
+            RECIPES_URL,
+            {'tags': f'{tag1.id},{tag2.id}', 'tags_match': 'all'}
+        )
+
+        assert res.data == [RecipeSerializer(recipe1).data]
+
+    def test_filter_recipes_by_no_ingredients(self, auto_login_user,
+                                              api_client):
+        """ Test filtering recipes having none of the ingredients """
+        payload = {
+            'title': 'Sample Recipe',
+            'time_minutes': 10,
+            'price': 5.00
+        }
+
+        recipe1 = Recipe.objects.create(user=auto_login_user, **payload)
+        recipe2 = Recipe.objects.create(user=auto_login_user, **payload)
+        recipe3 = Recipe.objects.create(user=auto_login_user, **payload)
+        ingredient1 = Ingredient.objects.create(
+            user=auto_login_user, name='Feta Cheese')
+        ingredient2 = Ingredient.objects.create(
+            user=auto_login_user, name='Tarama')
+        recipe1.ingredients.add(ingredient1)
+        recipe2.ingredients.add(ingredient2)
+
+        res = api_client.get(
+            RECIPES_URL,
+            {'ingredients': f'{ingredient1.id}', 'ingredients_match': 'none'}
+        )
+
+        ids = [recipe['id'] for recipe in res.data]
+        assert ids == [recipe3.id, recipe2.id]
+
+    def test_filter_recipes_invalid_mode(self, auto_login_user, api_client):
+        """ Test an unknown match mode is rejected """
+        res = api_client.get(RECIPES_URL, {'tags': '1', 'tags_match': 'some'})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestRecipeSearch:
+    """ Test searching recipes """
+
+    def test_search_recipes(self, auto_login_user, api_client):
+        """ Test searching recipes by title, tag and ingredient names """
+        payload = {'time_minutes': 10, 'price': 5.00}
+        recipe1 = Recipe.objects.create(
+            user=auto_login_user, title='Thai Curry', **payload)
+        recipe2 = Recipe.objects.create(
+            user=auto_login_user, title='Lentil Soup', **payload)
+        recipe3 = Recipe.objects.create(
+            user=auto_login_user, title='Porridge', **payload)
+        recipe2.tags.add(Tag.objects.create(user=auto_login_user, name='Thai'))
+        recipe3.ingredients.add(
+            Ingredient.objects.create(user=auto_login_user, name='Thai basil')
+        )
+
+        res = api_client.get(RECIPES_URL, {'q': 'thai'})
+
+        ids = {recipe['id'] for recipe in res.data}
+        assert res.status_code == status.HTTP_200_OK
+        assert ids == {recipe1.id, recipe2.id, recipe3.id}
+
+        res = api_client.get(RECIPES_URL, {'q': 'thai soup'})
+
+        assert [recipe['id'] for recipe in res.data] == [recipe2.id]
+
+    def test_search_recipes_ranked(self, auto_login_user, api_client):
+        """ Test recipes matching more often are returned first """
+        payload = {'time_minutes': 10, 'price': 5.00}
+        recipe1 = Recipe.objects.create(
+            user=auto_login_user, title='Kale Salad', **payload)
+        recipe2 = Recipe.objects.create(
+            user=auto_login_user, title='Kale Chips', **payload)
+        recipe1.ingredients.add(
+            Ingredient.objects.create(user=auto_login_user, name='Kale')
+        )
+
+        res = api_client.get(RECIPES_URL, {'q': 'kale', 'page_size': 1})
+
+        assert res.data['results'][0]['id'] == recipe1.id
+
+        res = api_client.get(res.data['next'])
+
+        assert res.data['results'][0]['id'] == recipe2.id
+        assert res.data['next'] is None
+
+    def test_search_follows_renamed_tag(self, auto_login_user, api_client):
+        """ Test the search document follows tag renames and removals """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        recipe.tags.add(tag)
+        tag.name = 'Vegetarian'
+        tag.save()
+
+        assert api_client.get(RECIPES_URL, {'q': 'vegan'}).data == []
+        assert len(api_client.get(RECIPES_URL, {'q': 'vegetarian'}).data) == 1
+
+        tag.delete()
+
+        assert api_client.get(RECIPES_URL, {'q': 'vegetarian'}).data == []
+
+    def test_delete_user_with_tagged_recipes(self, auto_login_user):
+        """ Test deleting a user drops the search terms of their recipes """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=auto_login_user, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=auto_login_user, name='Salt')
+        )
+
+        auto_login_user.delete()
+
+        assert not Recipe.objects.exists()
+        assert not RecipeSearchTerm.objects.exists()
+
+
+class TestRecipeSparseFields:
+    """ Test trimming recipe responses with fields and omit """
+
+    def test_list_fields(self, auto_login_user, api_client):
+        """ Test listing only some fields skips the relation queries """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=auto_login_user, name='Vegan'))
+
+        with CaptureQueriesContext(connection) as full:
+            api_client.get(RECIPES_URL)
+        with CaptureQueriesContext(connection) as sparse:
+            res = api_client.get(RECIPES_URL, {'fields': 'id,title,price'})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data == [
+            {'id': recipe.id, 'title': 'Sample Recipe', 'price': '5.00'}
+        ]
+        assert len(sparse.captured_queries) == \
+            len(full.captured_queries) - 2
+
+    def test_list_fields_paginated(self, auto_login_user, api_client):
+        """ Test sparse pages still link to the next page """
+        for i in range(3):
+            Recipe.objects.create(
+                user=auto_login_user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+
+        res = api_client.get(RECIPES_URL, {'fields': 'title', 'page_size': 2})
+        res = api_client.get(res.data['next'])
+
+        assert res.data['results'] == [{'title': 'Recipe 0'}]
+
+    def test_detail_omit(self, auto_login_user, api_client):
+        """ Test omitted relations are dropped from a recipe detail """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=auto_login_user, name='Vegan'))
+        url = detail_url(recipe.id)
+        etag = api_client.get(url)['ETag']
+
+        res = api_client.get(
+            url,
+            {'omit': 'tags,ingredients'},
+            HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert 'tags' not in res.data
+        assert 'ingredients' not in res.data
+        assert res.data['title'] == 'Sample Recipe'
+
+    def test_unknown_fields(self, auto_login_user, api_client):
+        """ Test asking for an unknown field is rejected """
+        res = api_client.get(RECIPES_URL, {'fields': 'id,user'})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'fields' in res.data
+
+
+class TestRecipeExpand:
+    """ Test embedding related objects in recipe lists """
+
+    def test_expand_tags(self, auto_login_user, api_client):
+        """ Test expanded tags are embedded as serialized tags """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        ingredient = Ingredient.objects.create(
+            user=auto_login_user, name='Salt'
+        )
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        tag.refresh_from_db()
+
+        res = api_client.get(RECIPES_URL, {'expand': 'tags'})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data[0]['tags'] == [TagSerializer(tag).data]
+        assert res.data[0]['ingredients'] == [ingredient.id]
+
+    def test_expand_query_count(self, auto_login_user, api_client):
+        """ Test expanding takes the same queries for any list size """
+        tags = [
+            Tag.objects.create(user=auto_login_user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+
+        def list_recipes(count):
+            for i in range(count):
+                recipe = Recipe.objects.create(
+                    user=auto_login_user,
+                    title=f'Recipe {i}',
+                    time_minutes=10,
+                    price=5.00
+                )
+                recipe.tags.add(*tags)
+            with CaptureQueriesContext(connection) as ctx:
+                res = api_client.get(
+                    RECIPES_URL, {'expand': 'tags,ingredients'}
+                )
+            return res, len(ctx.captured_queries)
+
+        res, small = list_recipes(1)
+        res, large = list_recipes(5)
+
+        assert small == large
+        assert len(res.data) == 6
+        assert all(len(item['tags']) == 3 for item in res.data)
+
+    def test_expand_unknown(self, auto_login_user, api_client):
+        """ Test expanding an unknown relation is rejected """
+        res = api_client.get(RECIPES_URL, {'expand': 'user'})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'expand' in res.data
+
+
+class TestRecipeConditionalGet:
+    """ Test conditional requests on recipes """
+
+    def test_list_not_modified(self, auto_login_user, api_client):
+        """ Test an unchanged recipe list answers 304 """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        res = api_client.get(RECIPES_URL)
+        etag = res['ETag']
+
+        res = api_client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+        recipe.tags.add(Tag.objects.create(user=auto_login_user, name='Vegan'))
+        res = api_client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == status.HTTP_200_OK
+        assert res['ETag'] != etag
+
+    def test_list_modified_by_delete(self, auto_login_user, api_client):
+        """ Test deleting a recipe changes the list ETag """
+        payload = {
+            'title': 'Sample Recipe',
+            'time_minutes': 10,
+            'price': 5.00
+        }
+        recipe = Recipe.objects.create(user=auto_login_user, **payload)
+        Recipe.objects.create(user=auto_login_user, **payload)
+        etag = api_client.get(RECIPES_URL)['ETag']
+
+        recipe.delete()
+        res = api_client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_200_OK
+
+    def test_detail_not_modified(self, auto_login_user, api_client):
+        """ Test an unchanged recipe answers 304 until a tag is renamed """
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        recipe.tags.add(tag)
+        res = api_client.get(detail_url(recipe.id))
+        etag = res['ETag']
+
+        assert 'Last-Modified' in res
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = api_client.get(
+                detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 1
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = api_client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data['tags'][0]['name'] == 'Vegetarian'
+
+
+class TestRecipeBulkCreate:
+    """ Test creating recipes in bulk """
+
+    def test_bulk_create_recipes(self, auto_login_user, api_client):
+        """ Test creating several recipes with tags and ingredients """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        ingredient = Ingredient.objects.create(
+            user=auto_login_user, name='Kale')
+        payload = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+            }
+            for i in range(5)
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = api_client.post(BULK_RECIPES_URL, payload, format='json')
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert len(ctx.captured_queries) < 15
+        for item, result in zip(payload, res.data):
+            recipe = Recipe.objects.get(id=result['id'])
+            assert recipe.title == item['title']
+            assert list(recipe.tags.all()) == [tag]
+            assert list(recipe.ingredients.all()) == [ingredient]
+
+        tag.refresh_from_db()
+        assert tag.recipe_count == 5
+
+        res = api_client.get(RECIPES_URL, {'q': 'recipe kale'})
+        assert len(res.data) == 5
+
+    def test_bulk_create_partial(self, auto_login_user, api_client):
+        """ Test invalid items are reported without blocking valid ones """
+        user2 = get_user_model().objects.create_user(
+            'other@test.com',
+            'testpass'
+        )
+        other_tag = Tag.objects.create(user=user2, name='Fruity')
+        payload = [
+            {'title': 'Valid', 'time_minutes': 10, 'price': '5.00'},
+            {'title': 'No time', 'price': '5.00'},
+            {
+                'title': 'Foreign tag',
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [other_tag.id],
+            },
+        ]
+
+        res = api_client.post(BULK_RECIPES_URL, payload, format='json')
+
+        assert res.status_code == status.HTTP_207_MULTI_STATUS
+        assert Recipe.objects.get(id=res.data[0]['id']).title == 'Valid'
+        assert 'time_minutes' in res.data[1]['errors']
+        assert 'tags' in res.data[2]['errors']
+        assert Recipe.objects.count() == 1
+
+    def test_bulk_create_requires_list(self, auto_login_user, api_client):
+        """ Test a bulk create payload must be a list """
+        payload = {'title': 'Valid', 'time_minutes': 10, 'price': '5.00'}
+        res = api_client.post(BULK_RECIPES_URL, payload, format='json')
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestRecipeExport:
+    """ Test streaming the recipe book of a user """
+
+    @pytest.fixture
+    def recipe(self, auto_login_user):
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(
+            Tag.objects.create(user=auto_login_user, name='Vegan'),
+            Tag.objects.create(user=auto_login_user, name='Dessert')
+        )
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=auto_login_user, name='Salt')
+        )
+        return recipe
+
+    def test_export_ndjson(self, recipe, api_client):
+        """ Test recipes are streamed as lines of JSON """
+        other = get_user_model().objects.create_user('other@test.com', 'pw')
+        Recipe.objects.create(
+            user=other, title='Other', time_minutes=5, price=1.00
+        )
+
+        res = api_client.get(EXPORT_RECIPES_URL)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res['Content-Type'] == 'application/x-ndjson'
+        assert [json.loads(line) for line in lines] == [{
+            'id': recipe.id,
+            'title': 'Sample Recipe',
+            'time_minutes': 10,
+            'price': '5.00',
+            'link': '',
+            'tags': ['Vegan', 'Dessert'],
+            'ingredients': ['Salt'],
+        }]
+
+    def test_export_csv(self, recipe, api_client):
+        """ Test recipes are streamed as CSV with joined names """
+        res = api_client.get(EXPORT_RECIPES_URL, {'type': 'csv'})
+        content = b''.join(res.streaming_content).decode()
+
+        assert res['Content-Type'] == 'text/csv'
+        assert content.splitlines() == [
+            'id,title,time_minutes,price,link,tags,ingredients',
+            f'{recipe.id},Sample Recipe,10,5.00,,Vegan;Dessert,Salt',
+        ]
+
+    def test_export_chunked(self, recipe, api_client):
+        """ Test names are read once per chunk of recipes """
+        with patch('recipe.views.export_recipes') as export:
+            export.side_effect = lambda user: export_recipes(user, 2)
+            for i in range(4):
+                Recipe.objects.create(
+                    user=recipe.user,
+                    title=f'Recipe {i}',
+                    time_minutes=10,
+                    price=5.00
+                )
+            res = api_client.get(EXPORT_RECIPES_URL)
+            with CaptureQueriesContext(connection) as ctx:
+                lines = list(res.streaming_content)
+
+        assert len(lines) == 5
+        # One cursor over the rows, then two name queries per chunk
+        assert len(ctx.captured_queries) == 1 + 3 * 2
+
+    def test_export_invalid_type(self, auto_login_user, api_client):
+        """ Test an unknown export type is rejected """
+        res = api_client.get(EXPORT_RECIPES_URL, {'type': 'xml'})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.urls import include, path
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from recipe.async_views import async_urlpatterns, async_view
+from recipe.models import Tag, Recipe
+from recipe.urls import router
+from recipe.views import RecipeViewSet, TagViewSet
+
+
+# Recipe URLs as core/asgi.py serves them
+urlpatterns = [
+    path('api/recipe/', include((async_urlpatterns(router.urls), 'recipe')))
+]
+
+
+@pytest.fixture
+def user(transactional_db):
+    return get_user_model().objects.create_user('test@test.com', 'test123')
+
+
+def get(view, user, **kwargs):
+    request = APIRequestFactory().get('/')
+    force_authenticate(request, user=user)
+
+    return async_to_sync(view)(request, **kwargs)
+
+
+def asgi_get(path, query_string='', **headers):
+    """ Return the status and body of a GET through the ASGI application
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.encode(), value.encode())
+            for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(get_asgi_application())(scope, receive, send)
+
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:]
+    )
+
+
+def test_async_view_is_coroutine_function():
+    """ Test the wrapped view is run natively by the ASGI handler """
+    view = async_view(TagViewSet.as_view({'get': 'list'}))
+
+    assert asyncio.iscoroutinefunction(view)
+    assert view.csrf_exempt
+
+
+def test_async_list(user):
+    """ Test listing tags through the async view """
+    Tag.objects.create(user=user, name='Vegan')
+
+    res = get(async_view(TagViewSet.as_view({'get': 'list'})), user)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [tag['name'] for tag in res.data] == ['Vegan']
+
+
+def test_async_retrieve(user):
+    """ Test retrieving a recipe through the async view """
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Soup',
+        time_minutes=5,
+        price=5.00
+    )
+
+    res = get(
+        async_view(RecipeViewSet.as_view({'get': 'retrieve'})),
+        user,
+        pk=recipe.pk
+    )
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data['title'] == 'Soup'
+
+
+def test_async_create(user):
+    """ Test writes through the async view still reach the view """
+    request = APIRequestFactory().post('/', {'name': 'Vegan'})
+    force_authenticate(request, user=user)
+    view = async_view(TagViewSet.as_view({'get': 'list', 'post': 'create'}))
+
+    res = async_to_sync(view)(request)
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert Tag.objects.filter(user=user, name='Vegan').exists()
+
+
+def test_async_urlpatterns_keep_names():
+    """ Test the async URL patterns keep the names of the router ones """
+    patterns = async_urlpatterns(router.urls)
+
+    assert [pattern.name for pattern in patterns] == \
+        [pattern.name for pattern in router.urls]
+
+
+def test_async_urlpatterns_only_reads():
+    """ Test only the list and detail routes are made async """
+    async_names = {
+        pattern.name for pattern in async_urlpatterns(router.urls)
+        if asyncio.iscoroutinefunction(pattern.callback)
+    }
+
+    assert async_names == {
+        'tag-list', 'ingredient-list', 'recipe-list', 'recipe-detail'
+    }
+
+
+def test_asgi_export(user, settings):
+    """ Test the export streams a complete body under ASGI """
+    settings.ROOT_URLCONF = __name__
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Soup',
+        time_minutes=5,
+        price=5.00
+    )
+    recipe.tags.add(Tag.objects.create(user=user, name='Vegan'))
+    token = Token.objects.create(user=user)
+
+    status_code, body = asgi_get(
+        '/api/recipe/recipes/export/',
+        authorization=f'Token {token.key}'
+    )
+
+    assert status_code == status.HTTP_200_OK
+    assert [json.loads(line) for line in body.splitlines()] == [{
+        'id': recipe.id,
+        'title': 'Soup',
+        'time_minutes': 5,
+        'price': '5.00',
+        'link': '',
+        'tags': ['Vegan'],
+        'ingredients': [],
+    }]
@@ -0,0 +1,195 @@
+import csv
+import json
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from recipe.models import Tag, Ingredient, Recipe
+
+
+@pytest.fixture
+def create_user(db):
+    def make_user():
+        return get_user_model().objects.create_user(
+            'test@test.com',
+            'test123'
+        )
+    return make_user
+
+
+def test_explain_queries(create_user):
+    """ Test query plans are printed for each endpoint """
+    create_user()
+    out = StringIO()
+    call_command('explain_queries', stdout=out)
+
+    output = out.getvalue()
+    assert 'TagViewSet.list' in output
+    assert 'IngredientViewSet.list' in output
+    assert 'RecipeViewSet.retrieve' in output
+
+
+def test_repair_usage_counts(create_user):
+    """ Test drifted recipe counts of tags are repaired """
+    user = create_user()
+    tag = Tag.objects.create(user=user, name='Vegan')
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Soup',
+        time_minutes=5,
+        price=5.00
+    )
+    recipe.tags.add(tag)
+    Tag.objects.filter(pk=tag.pk).update(recipe_count=7)
+    out = StringIO()
+
+    call_command('repair_usage_counts', stdout=out)
+
+    tag.refresh_from_db()
+    assert tag.recipe_count == 1
+    assert 'tags: 1 wrong counts repaired' in out.getvalue()
+
+
+def test_export_recipes(create_user, tmp_path):
+    """ Test the recipes of a user are exported to a file """
+    user = create_user()
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Soup',
+        time_minutes=5,
+        price=5.00
+    )
+    recipe.tags.add(Tag.objects.create(user=user, name='Vegan'))
+    output = tmp_path / 'recipes.csv'
+
+    call_command(
+        'export_recipes', user.email, format='csv', output=str(output)
+    )
+
+    assert output.read_text().splitlines()[1] == \
+        f'{recipe.id},Soup,5,5.00,,Vegan,'
+
+
+def test_import_recipes(create_user, tmp_path):
+    """ Test recipes are imported with their tags and ingredients """
+    user = create_user()
+    vegan = Tag.objects.create(user=user, name='Vegan')
+    path = tmp_path / 'recipes.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in [
+        {'title': 'Soup', 'time_minutes': 5, 'price': '5.00',
+         'tags': ['Vegan', 'Quick'], 'ingredients': ['Salt']},
+        {'title': 'Stew', 'time_minutes': 60, 'price': '8.50',
+         'tags': ['Quick']},
+        {'title': 'Salad', 'time_minutes': 10, 'price': '3.00'},
+    ]))
+    out = StringIO()
+
+    call_command('import_recipes', user.email, str(path), batch_size=2,
+                 stdout=out)
+
+    soup = Recipe.objects.get(user=user, title='Soup')
+    assert Recipe.objects.filter(user=user).count() == 3
+    assert list(soup.tags.values_list('name', flat=True)) == \
+        ['Vegan', 'Quick']
+    assert list(soup.ingredients.values_list('name', flat=True)) == ['Salt']
+    assert Tag.objects.filter(user=user).count() == 2
+    vegan.refresh_from_db()
+    assert vegan.recipe_count == 1
+    assert Tag.objects.get(user=user, name='Quick').recipe_count == 2
+    assert 'rows/s' in out.getvalue()
+    assert not (tmp_path / 'recipes.ndjson.checkpoint').exists()
+
+
+def test_import_exported_csv(create_user, tmp_path):
+    """ Test an exported CSV recipe book imports for another user """
+    user = create_user()
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Soup',
+        time_minutes=5,
+        price=5.00
+    )
+    recipe.ingredients.add(Ingredient.objects.create(user=user, name='Salt'))
+    other = get_user_model().objects.create_user('other@test.com', 'pw')
+    path = tmp_path / 'recipes.csv'
+    call_command('export_recipes', user.email, format='csv', output=str(path))
+
+    call_command('import_recipes', other.email, str(path), stdout=StringIO())
+
+    imported = Recipe.objects.get(user=other)
+    assert imported.title == 'Soup'
+    assert imported.ingredients.get().user == other
+
+
+def test_import_resumes_from_checkpoint(create_user, tmp_path):
+    """ Test a failed import keeps its committed batches and resumes """
+    user = create_user()
+    records = [
+        {'title': f'Recipe {i}', 'time_minutes': 5, 'price': '1.00'}
+        for i in range(5)
+    ]
+    records[3]['price'] = 'free'
+    path = tmp_path / 'recipes.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in records))
+
+    with pytest.raises(
+        CommandError, match='Record 4: price: A valid number is required'
+    ):
+        call_command('import_recipes', user.email, str(path),
+                     batch_size=2, stdout=StringIO())
+
+    assert Recipe.objects.filter(user=user).count() == 2
+
+    records[3]['price'] = '0.00'
+    path.write_text('\n'.join(json.dumps(record) for record in records))
+    out = StringIO()
+    call_command('import_recipes', user.email, str(path), batch_size=2,
+                 stdout=out)
+
+    assert 'Resuming after 2 records' in out.getvalue()
+    assert sorted(
+        Recipe.objects.filter(user=user).values_list('title', flat=True)
+    ) == [f'Recipe {i}' for i in range(5)]
+
+
+@pytest.mark.parametrize('fmt, content, line', [
+    ('ndjson', '{"title": "Soup"}\n\n{"title": \n', 3),
+    ('ndjson', '{"title": "Soup"}\n["Stew"]\n', 2),
+    ('csv', 'title\nSoup\n' + 'x' * (csv.field_size_limit() + 1), 3),
+], ids=['invalid-json', 'not-an-object', 'csv-field-too-large'])
+def test_import_malformed_line(create_user, tmp_path, fmt, content, line):
+    """ Test unreadable input fails with its line number """
+    user = create_user()
+    path = tmp_path / f'recipes.{fmt}'
+    path.write_text(content)
+
+    with pytest.raises(CommandError, match=f'Line {line}: '):
+        call_command('import_recipes', user.email, str(path),
+                     stdout=StringIO())
+
+    assert not Recipe.objects.filter(user=user).exists()
+
+
+@pytest.mark.parametrize('tags', [
+    'Vegan',
+    [{'name': 'Vegan'}],
+    [''],
+    ['x' * 256],
+], ids=['string', 'objects', 'empty-name', 'long-name'])
+def test_import_invalid_names(create_user, tmp_path, tags):
+    """ Test tags must be a list of names """
+    user = create_user()
+    path = tmp_path / 'recipes.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in [
+        {'title': 'Soup', 'time_minutes': 5, 'price': '5.00'},
+        {'title': 'Stew', 'time_minutes': 60, 'price': '8.50', 'tags': tags},
+    ]))
+
+    with pytest.raises(CommandError, match='Record 2: tags: Expecting a '):
+        call_command('import_recipes', user.email, str(path),
+                     stdout=StringIO())
+
+    assert not Recipe.objects.filter(user=user).exists()
+    assert not Tag.objects.filter(user=user).exists()
@@ -0,0 +1,67 @@
+import hashlib
+import os
+import pytest
+from unittest.mock import patch
+from django.core.files.base import ContentFile
+
+from recipe.models import StoredFile
+from recipe.storage import ContentAddressedStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return ContentAddressedStorage(location=str(tmp_path))
+
+
+@pytest.mark.django_db
+def test_save_names_file_by_content(storage):
+    """ Test files are named by hash under nested prefix directories """
+    content = b'recipe image'
+    digest = hashlib.sha256(content).hexdigest()
+
+    name = storage.save('photo.JPG', ContentFile(content))
+
+    assert name == f'uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+    with storage.open(name) as stored:
+        assert stored.read() == content
+
+
+@pytest.mark.django_db(transaction=True)
+def test_identical_uploads_shared(storage):
+    """ Test identical uploads share a file until the last one is deleted """
+    name1 = storage.save('one.jpg', ContentFile(b'same'))
+    name2 = storage.save('two.jpg', ContentFile(b'same'))
+    other = storage.save('three.jpg', ContentFile(b'other'))
+
+    assert name1 == name2
+    assert name1 != other
+    assert StoredFile.objects.get(name=name1).references == 2
+
+    storage.delete(name1)
+    assert os.path.exists(storage.path(name1))
+    assert StoredFile.objects.get(name=name1).references == 1
+
+    storage.delete(name2)
+    assert not os.path.exists(storage.path(name1))
+    assert not StoredFile.objects.filter(name=name1).exists()
+    assert os.path.exists(storage.path(other))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_during_last_release_kept(storage):
+    """ Test an upload racing the removal of its last copy keeps the file """
+    name = storage.save('one.jpg', ContentFile(b'same'))
+    with patch('recipe.storage.transaction.on_commit') as on_commit:
+        storage.delete(name)
+
+    assert StoredFile.objects.get(name=name).references == 0
+
+    storage.save('two.jpg', ContentFile(b'same'))
+    # The removal queued by the release runs after the new upload
+    on_commit.call_args[0][0]()
+
+    assert os.path.exists(storage.path(name))
+    assert StoredFile.objects.get(name=name).references == 1
+
+    storage.delete(name)
+    assert not os.path.exists(storage.path(name))
@@ -1,10 +1,13 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from recipe import models
+from recipe.cache import cache_stats
 from recipe.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
@@ -28,6 +31,14 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+
+
 @pytest.fixture
 def auto_login_user(db, api_client):
     user = get_user_model().objects.create_user(
@@ -75,6 +86,30 @@ class TestPrivateTagsApi:
         assert res.status_code == status.HTTP_200_OK
         assert res.data == serializer.data
 
+    def test_retrieve_tags_paginated(self, auto_login_user, api_client):
+        """Test tags are paginated by name when a page size is given"""
+        Tag.objects.create(user=auto_login_user, name='Vegan')
+        Tag.objects.create(user=auto_login_user, name='Dessert')
+        Tag.objects.create(user=auto_login_user, name='Breakfast')
+
+        res = api_client.get(TAGS_URL, {'page_size': 2})
+        names = [tag['name'] for tag in res.data['results']]
+        res = api_client.get(res.data['next'])
+        names += [tag['name'] for tag in res.data['results']]
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data['next'] is None
+        assert names == ['Vegan', 'Dessert', 'Breakfast']
+
+    def test_retrieve_tags_omit(self, auto_login_user, api_client):
+        """Test omitting fields from the tag list"""
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+
+        res = api_client.get(TAGS_URL, {'omit': 'name,recipe_count'})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data == [{'id': tag.id}]
+
     def test_tags_limited_to_user(self, auto_login_user, api_client):
         """Test that tags returned are for authenticated user"""
         user2 = get_user_model().objects.create_user(
@@ -122,6 +157,7 @@ class TestPrivateTagsApi:
 
         recipe = Recipe.objects.create(user=auto_login_user, **payload)
         recipe.tags.add(tag1)
+        tag1.refresh_from_db()
 
         res = api_client.get(TAGS_URL, {'assigned_only': 1})
         serializer1 = TagSerializer(tag1)
@@ -149,3 +185,148 @@ class TestPrivateTagsApi:
         res = api_client.get(TAGS_URL, {'assigned_only': 1})
 
         assert len(res.data) == 1
+
+    def test_retrieve_tags_msgpack(self, auto_login_user, api_client):
+        """ Test tags can be retrieved as MessagePack """
+        msgpack = pytest.importorskip('msgpack')
+        Tag.objects.create(user=auto_login_user, name='Vegan')
+
+        res = api_client.get(TAGS_URL, HTTP_ACCEPT='application/msgpack')
+
+        assert res['Content-Type'] == 'application/msgpack'
+        assert msgpack.unpackb(res.content)[0]['name'] == 'Vegan'
+
+    def test_retrieve_tags_cached(self, auto_login_user, api_client,
+                                  shared_cache):
+        """ Test repeated tag lists are served from the cache """
+        Tag.objects.create(user=auto_login_user, name='Vegan')
+        api_client.get(TAGS_URL)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = api_client.get(TAGS_URL)
+
+        assert len(res.data) == 1
+        assert len(ctx.captured_queries) == 0
+        assert cache_stats() == {'hits': 1, 'misses': 1}
+
+    def test_retrieve_tags_not_modified(self, auto_login_user, api_client,
+                                        shared_cache):
+        """ Test an unchanged tag list answers 304 without queries """
+        Tag.objects.create(user=auto_login_user, name='Vegan')
+        etag = api_client.get(TAGS_URL)['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = api_client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(ctx.captured_queries) == 0
+
+        Tag.objects.create(user=auto_login_user, name='Dessert')
+        res = api_client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.data) == 2
+
+    def test_retrieve_tags_local_cache_unused(self, auto_login_user,
+                                              api_client):
+        """ Test lists skip a cache each worker has its own copy of """
+        Tag.objects.create(user=auto_login_user, name='Vegan')
+        etag = api_client.get(TAGS_URL)['ETag']
+        # Written by another worker, whose cache this one can't see
+        Tag.objects.bulk_create([Tag(user=auto_login_user, name='Dessert')])
+
+        res = api_client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.data) == 2
+        assert cache_stats() == {'hits': 0, 'misses': 0}
+
+    def test_retrieve_tags_cache_invalidated(self, auto_login_user,
+                                             api_client, shared_cache):
+        """ Test cached tag lists follow tag and recipe changes """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        recipe = Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        assert api_client.get(TAGS_URL, {'assigned_only': 1}).data == []
+
+        recipe.tags.add(tag)
+        res = api_client.get(TAGS_URL, {'assigned_only': 1})
+        assert len(res.data) == 1
+
+        recipe.delete()
+        assert api_client.get(TAGS_URL, {'assigned_only': 1}).data == []
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        assert api_client.get(TAGS_URL).data[0]['name'] == 'Vegetarian'
+
+
+class TestTagUsageCounts:
+    """ Test the recipe counts maintained on tags """
+
+    @pytest.fixture
+    def recipe(self, auto_login_user):
+        return Recipe.objects.create(
+            user=auto_login_user,
+            title='Sample Recipe',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def count(self, tag):
+        tag.refresh_from_db()
+        return tag.recipe_count
+
+    def test_counts_follow_links(self, auto_login_user, recipe):
+        """ Test counts follow adding, removing and clearing tags """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+
+        recipe.tags.add(tag)
+        assert self.count(tag) == 1
+
+        recipe.tags.remove(tag)
+        assert self.count(tag) == 0
+
+        tag.recipe_set.add(recipe)
+        assert self.count(tag) == 1
+
+        recipe.tags.clear()
+        assert self.count(tag) == 0
+
+    def test_count_follows_recipe_delete(self, auto_login_user, recipe):
+        """ Test deleting a recipe releases its tags """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        recipe.tags.add(tag)
+
+        recipe.delete()
+
+        assert self.count(tag) == 0
+
+    def test_save_keeps_count(self, auto_login_user, recipe):
+        """ Test saving a stale tag instance keeps its count """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        recipe.tags.add(tag)
+
+        tag.name = 'Vegetarian'
+        tag.save()
+
+        assert self.count(tag) == 1
+
+    def test_assigned_only_without_join(self, auto_login_user, recipe,
+                                        api_client):
+        """ Test assigned_only filters on the count, not the links """
+        tag = Tag.objects.create(user=auto_login_user, name='Vegan')
+        recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = api_client.get(TAGS_URL, {'assigned_only': 1})
+
+        assert [item['recipe_count'] for item in res.data] == [1]
+        assert not any(
+            'recipe_recipe_tags' in query['sql']
+            for query in ctx.captured_queries
+        )
@@ -0,0 +1,110 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from recipe.models import Recipe, Tag, Ingredient
+from recipe.serializers import RecipeSerializer, TagSerializer, \
+    IngredientSerializer, RecipeValuesSerializer, TagValuesSerializer, \
+    IngredientValuesSerializer, IdentityMap
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create_user('test@test.com', 'test123')
+
+
+@pytest.fixture
+def context():
+    return {'request': APIRequestFactory().get('/')}
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+def test_recipe_values_parity(user, context):
+    """ Test the values serializer emits the recipe serializer's JSON """
+    tags = [Tag.objects.create(user=user, name=f'tag {i}') for i in range(3)]
+    ingredient = Ingredient.objects.create(user=user, name='Salt')
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Steak',
+        time_minutes=10,
+        price=5.5,
+        link='https://example.com/steak',
+        image_status='ready',
+        image_renditions={'thumb': 'uploads/recipe/steak-thumb.jpg'}
+    )
+    recipe.tags.add(*tags)
+    recipe.ingredients.add(ingredient)
+    Recipe.objects.create(user=user, title='Soup', time_minutes=5, price=1)
+
+    recipes = Recipe.objects.filter(user=user).order_by('-id')
+    expected = RecipeSerializer(
+        recipes.prefetch_related('tags', 'ingredients'),
+        many=True,
+        context=context
+    ).data
+    data = RecipeValuesSerializer(
+        RecipeValuesSerializer.values(recipes),
+        many=True,
+        context=context
+    ).data
+
+    assert render(data) == render(expected)
+
+
+@pytest.mark.parametrize('model, serializer_class, values_class', [
+    (Tag, TagSerializer, TagValuesSerializer),
+    (Ingredient, IngredientSerializer, IngredientValuesSerializer),
+])
+def test_attr_values_parity(user, model, serializer_class, values_class):
+    """ Test the values serializers emit the tag and ingredient JSON """
+    recipe = Recipe.objects.create(
+        user=user, title='Steak', time_minutes=10, price=5
+    )
+    for name in ('Vegan', 'Dessert'):
+        attr = model.objects.create(user=user, name=name)
+    getattr(recipe, f'{model._meta.model_name}s').add(attr)
+
+    attrs = model.objects.filter(user=user).order_by('-name', '-id')
+    data = values_class(values_class.values(attrs), many=True).data
+
+    assert render(data) == render(serializer_class(attrs, many=True).data)
+
+
+def test_recipe_values_queries(user):
+    """ Test a recipe list takes one query per relation """
+    for i in range(5):
+        recipe = Recipe.objects.create(
+            user=user, title=f'recipe {i}', time_minutes=5, price=1
+        )
+        recipe.tags.add(Tag.objects.create(user=user, name=f'tag {i}'))
+
+    with CaptureQueriesContext(connection) as ctx:
+        data = RecipeValuesSerializer(
+            RecipeValuesSerializer.values(Recipe.objects.all())
+        ).data
+
+    assert len(data) == 5
+    assert len(ctx.captured_queries) == 3
+
+
+def test_identity_map_loads_once(user):
+    """ Test the identity map only queries objects it has not seen """
+    tags = [Tag.objects.create(user=user, name=f'tag {i}') for i in range(3)]
+    identity_map = IdentityMap()
+    identity_map.get_many(TagValuesSerializer, [tags[0].id, tags[1].id])
+
+    with CaptureQueriesContext(connection) as ctx:
+        seen = identity_map.get_many(TagValuesSerializer, [tags[1].id])
+        objects = identity_map.get_many(
+            TagValuesSerializer, [tag.id for tag in tags]
+        )
+
+    assert len(ctx.captured_queries) == 1
+    assert objects[tags[1].id] is seen[tags[1].id]
+    assert objects[tags[2].id] == TagSerializer(tags[2]).data
@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from recipe import views
+from recipe.async_views import async_urlpatterns
 
 
 router = DefaultRouter()
@@ -11,6 +13,10 @@ router.register('recipes', views.RecipeViewSet)
 
 app_name = 'recipe'
 
+urls = router.urls
+if getattr(settings, 'RECIPE_ASYNC_VIEWS', False):
+    urls = async_urlpatterns(urls)
+
 urlpatterns = [
-    path('', include(router.urls))
+    path('', include(urls))
 ]
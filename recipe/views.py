@@ -1,20 +1,39 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from authentication.authentication import SignedTokenAuthentication
 from recipe.models import Tag, Ingredient, Recipe
 
 from recipe import serializers
+from recipe.bulk import bulk_create_recipes, bulk_get_or_create_attrs, \
+    MAX_BULK_SIZE
+from recipe.cache import list_version, lists_cached
+from recipe.export import export_recipes, spool, FORMATS
+from recipe.filters import filter_by_related_ids, MATCH_ANY, MATCH_MODES
+from recipe.mixins import CachedListMixin, ConditionalListMixin, \
+    ConditionalRetrieveMixin, SparseFieldsMixin
+from recipe.pagination import RecipeCursorPagination, \
+    RecipeAttrCursorPagination
+from recipe.renditions import enqueue_renditions
+from recipe.search import search_recipes
 
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+class BaseRecipeAttrViewSet(ConditionalListMixin,
+                            CachedListMixin,
+                            SparseFieldsMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin):
     """ Base viewset for user owned recipe attributes """
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (SignedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttrCursorPagination
 
     def get_queryset(self):
         """ Return objects for the current authenticated user only """
@@ -23,60 +42,170 @@ class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
 
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+        queryset = queryset.filter(
+            user=self.request.user
+        ).order_by('-name', '-id')
+        if self.action == 'list':
+            return self.values_serializer_class.values(
+                queryset,
+                self.sparse_fields
+            )
+
+        return queryset
+
+    def list_state(self):
+        """ Cached lists change exactly when their cache version does """
+        if not lists_cached():
+            return super().list_state()
+
+        return (list_version(self.queryset.model, self.request.user.pk),)
 
     def perform_create(self, serializer):
         """Create a new tag"""
         serializer.save(user=self.request.user)
 
+    def get_serializer_class(self):
+        """ Return appropriate serializer class """
+        if self.action == 'bulk_get_or_create':
+            return serializers.BulkNamesSerializer
+        elif self.action == 'list':
+            return self.values_serializer_class
+
+        return self.serializer_class
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_get_or_create(self, request):
+        """ Return ids for a list of names, creating the missing ones """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        mapping = bulk_get_or_create_attrs(
+            self.queryset.model,
+            request.user,
+            serializer.validated_data['names']
+        )
+
+        return Response(mapping, status=status.HTTP_200_OK)
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    values_serializer_class = serializers.TagValuesSerializer
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    values_serializer_class = serializers.IngredientValuesSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalListMixin,
+                    ConditionalRetrieveMixin,
+                    SparseFieldsMixin,
+                    viewsets.ModelViewSet):
     """ Manage recipes in the database """
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (SignedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, qs):
         """ Convert a list of stirng IDs to a list of integers """
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _match_mode(self, param):
+        """ Return the any/all/none match mode requested for a filter """
+        name = f'{param}_match'
+        mode = self.request.query_params.get(name, MATCH_ANY)
+        if mode not in MATCH_MODES:
+            raise ValidationError(
+                {name: f'Must be one of: {", ".join(MATCH_MODES)}'}
+            )
+
+        return mode
+
+    @cached_property
+    def expand(self):
+        """ Return the relations to embed in a list, from ?expand= """
+        value = self.request.query_params.get('expand', '')
+        names = {name for name in value.split(',') if name}
+        unknown = names.difference(
+            serializers.RecipeValuesSerializer.expandable
+        )
+        if unknown:
+            raise ValidationError(
+                {'expand': [f'Cannot expand: {", ".join(sorted(unknown))}']}
+            )
+
+        return names
+
+    def get_serializer_context(self):
+        """ Share one identity map between the expanded relations """
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['expand'] = self.expand
+            context['identity_map'] = serializers.IdentityMap()
+
+        return context
+
     def get_queryset(self):
         """ Return objects for the current authenticated user only """
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
         queryset = self.queryset
 
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+        for param in ('tags', 'ingredients'):
+            ids = self.request.query_params.get(param)
+            if ids:
+                queryset = filter_by_related_ids(
+                    queryset,
+                    param,
+                    self._params_to_ints(ids),
+                    self._match_mode(param)
+                )
+
+        queryset = queryset.filter(user=self.request.user)
+
+        query = self.request.query_params.get('q')
+        if query:
+            queryset = search_recipes(queryset, query).order_by('-rank', '-id')
+        else:
+            queryset = queryset.order_by('-id')
+
+        return self._prefetch_related(queryset)
 
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+    def _prefetch_related(self, queryset):
+        """ Load the relations serialized by the current action
 
-        return queryset.filter(user=self.request.user)
+        Lists read plain rows, their related ids being fetched by the
+        values serializer. Fields left out of a sparse fieldset are
+        neither selected nor prefetched.
+        """
+        if self.action == 'list':
+            return serializers.RecipeValuesSerializer.values(
+                queryset,
+                self.sparse_fields
+            )
+        elif self.action == 'retrieve':
+            columns, relations = self.get_serializer().sources()
+            return queryset.only('id', *columns).prefetch_related(*relations)
+
+        return queryset
 
     def get_serializer_class(self):
         """ Return appropriate serializer class """
-        if self.action == 'retrieve':
+        if self.action == 'list':
+            return serializers.RecipeValuesSerializer
+        elif self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'bulk_create':
+            return serializers.RecipeBulkItemSerializer
 
         return self.serializer_class
 
@@ -95,6 +224,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save()
+            enqueue_renditions(recipe.pk)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -104,3 +234,47 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """ Stream every recipe of the user as NDJSON or CSV """
+        export_format = request.query_params.get('type', 'ndjson')
+        if export_format not in FORMATS:
+            raise ValidationError(
+                {'type': [f'Must be one of: {", ".join(FORMATS)}']}
+            )
+
+        render, content_type = FORMATS[export_format]
+        lines = render(export_recipes(request.user))
+        if isinstance(request._request, ASGIRequest):
+            lines = spool(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{export_format}"'
+
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_create(self, request):
+        """ Create a list of recipes at once """
+        if not isinstance(request.data, list):
+            return Response(
+                {'non_field_errors': ['Expected a list of recipes.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > MAX_BULK_SIZE:
+            return Response(
+                {'non_field_errors': [
+                    f'Ensure there are no more than {MAX_BULK_SIZE} recipes.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = bulk_create_recipes(request.user, request.data)
+        failed = any('errors' in result for result in results)
+
+        return Response(
+            results,
+            status=status.HTTP_207_MULTI_STATUS if failed
+            else status.HTTP_201_CREATED
+        )
@@ -1,7 +1,11 @@
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import authenticate, get_user_model
+from django.core import signing
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from authentication import hashing
+from authentication.tokens import ACCESS, REFRESH, read_token
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the users object"""
@@ -12,8 +16,16 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
 
     def create(self, validated_data):
-        """Create a new user with encrypted password and return it"""
-        return get_user_model().objects.create_user(**validated_data)
+        """Create a new user with encrypted password and return it
+
+        The password is hashed off the request worker; the user is then
+        created with the hash in a single insert.
+        """
+        manager = get_user_model().objects
+        password = hashing.make_password(validated_data.pop('password'))
+        email = manager.normalize_email(validated_data.pop('email'))
+
+        return manager.create(email=email, password=password, **validated_data)
 
     def update(self, instance, validated_data):
         """Update a user, setting the password correctly and return it"""
@@ -51,3 +63,44 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for refreshing a signed access token"""
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        """Validate the refresh token and its user"""
+        msg = _('Invalid or expired refresh token')
+        try:
+            claims = read_token(attrs['refresh'], REFRESH)
+        except signing.BadSignature:
+            raise serializers.ValidationError(msg, code='authorization')
+
+        user = get_user_model().objects.filter(
+            pk=claims['uid'],
+            is_active=True
+        ).first()
+        if not user:
+            raise serializers.ValidationError(msg, code='authorization')
+
+        attrs['claims'] = claims
+        attrs['user'] = user
+        return attrs
+
+
+class RevokeTokenSerializer(serializers.Serializer):
+    """Serializer for revoking a signed access or refresh token"""
+    token = serializers.CharField()
+
+    def validate(self, attrs):
+        """Validate the token to revoke"""
+        for kind in (ACCESS, REFRESH):
+            try:
+                attrs['claims'] = read_token(attrs['token'], kind)
+                return attrs
+            except signing.BadSignature:
+                pass
+
+        msg = _('Invalid or expired token')
+        raise serializers.ValidationError(msg, code='authorization')
@@ -1,12 +1,17 @@
 import pytest
-from django.contrib.auth import get_user_model
+from datetime import timedelta
+from django.contrib.auth import get_user_model, user_login_failed
 from django.urls import reverse
+from django.utils import timezone
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
+REFRESH_TOKEN_URL = reverse('user:token-refresh')
+REVOKE_TOKEN_URL = reverse('user:token-revoke')
 ME_URL = reverse('user:me')
 
 
@@ -85,6 +90,23 @@ class TestPublicUserApi:
         assert 'token' in res.data
         assert res.status_code == status.HTTP_200_OK
 
+    def test_create_token_replaces_expired(self, create_user, api_client,
+                                           settings):
+        """Test that logging in replaces a legacy token past its age"""
+        settings.LEGACY_TOKEN_MAX_AGE_DAYS = 30
+        payload = {'email': 'test@test.com', 'password': 'testpass'}
+        user = create_user(**payload)
+        expired = Token.objects.create(user=user)
+        Token.objects.filter(pk=expired.pk).update(
+            created=timezone.now() - timedelta(days=31)
+        )
+
+        res = api_client.post(TOKEN_URL, payload)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data['token'] != expired.key
+        assert Token.objects.get(user=user).key == res.data['token']
+
     def test_create_token_invalid_credentials(self, create_user, api_client):
         """Test that token is not created if invalid credentials are given"""
         payload = {'email': 'test@test.com', 'password': 'testpass'}
@@ -95,6 +117,25 @@ class TestPublicUserApi:
         assert 'token' not in res.data
         assert res.status_code == status.HTTP_400_BAD_REQUEST
 
+    def test_create_token_failure_signalled(self, create_user, api_client):
+        """Test failed log ins send the user_login_failed signal"""
+        create_user(email='test@test.com', password='testpass')
+        failures = []
+
+        def receiver(credentials, **kwargs):
+            failures.append(credentials)
+
+        user_login_failed.connect(receiver)
+        try:
+            api_client.post(
+                TOKEN_URL,
+                {'email': 'test@test.com', 'password': 'wrong'}
+            )
+        finally:
+            user_login_failed.disconnect(receiver)
+
+        assert [c['username'] for c in failures] == ['test@test.com']
+
     @pytest.mark.django_db
     def test_create_token_no_user(self, api_client):
         """Test that token is not created if user doens't exist"""
@@ -154,3 +195,103 @@ class TestPrivateUserApi:
         assert user.name == update_payload['name']
         assert user.check_password(update_payload['password']) == True
         assert res.status_code == status.HTTP_200_OK
+
+
+class TestSignedTokenApi:
+    """Test the signed token mode"""
+
+    @pytest.fixture(autouse=True)
+    def signed_mode(self, settings):
+        settings.AUTH_TOKEN_MODE = 'signed'
+
+    @pytest.fixture
+    def tokens(self, create_user, api_client):
+        payload = {'email': 'test@test.com', 'password': 'testpass'}
+        create_user(**payload)
+        return api_client.post(TOKEN_URL, payload).data
+
+    def test_signed_token_authenticates(self, tokens, api_client):
+        """Test a signed access token authenticates requests"""
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {tokens["token"]}')
+        res = api_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data['email'] == 'test@test.com'
+        assert not Token.objects.exists()
+
+    def test_signed_token_tampered(self, tokens, api_client):
+        """Test a tampered signed token is rejected"""
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {tokens["token"][:-2]}xx')
+        res = api_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_refresh_token(self, tokens, api_client):
+        """Test a refresh token can only be exchanged once"""
+        payload = {'refresh': tokens['refresh']}
+        res = api_client.post(REFRESH_TOKEN_URL, payload)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data['token'] != tokens['token']
+
+        res = api_client.post(REFRESH_TOKEN_URL, payload)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_revoke_token(self, tokens, api_client):
+        """Test a revoked access token is rejected"""
+        res = api_client.post(REVOKE_TOKEN_URL, {'token': tokens['token']})
+        assert res.status_code == status.HTTP_204_NO_CONTENT
+
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {tokens["token"]}')
+        res = api_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_revokes_tokens(self, tokens, api_client):
+        """Test changing the password revokes issued tokens"""
+        user = get_user_model().objects.get(email='test@test.com')
+        user.set_password('newpass')
+        user.save()
+
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {tokens["token"]}')
+        res = api_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestPasswordHashingQueue:
+    """Test sign up and log in when password hashing is saturated"""
+
+    @pytest.fixture(autouse=True)
+    def saturated(self, monkeypatch):
+        from authentication import hashing
+
+        slots = hashing.threading.BoundedSemaphore(1)
+        slots.acquire()
+        monkeypatch.setattr(hashing, '_slots', slots)
+
+    @pytest.mark.django_db
+    def test_create_user_saturated(self, api_client):
+        """Test sign up is rejected with Retry-After when saturated"""
+        payload = {
+            'email': 'test@test.com',
+            'password': 'testpass',
+            'name': 'Test',
+        }
+        res = api_client.post(CREATE_USER_URL, payload)
+
+        assert res.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert res['Retry-After'] == '1'
+        assert not get_user_model().objects.exists()
+
+    def test_create_token_saturated(self, create_user, api_client):
+        """Test log in is rejected with Retry-After when saturated"""
+        payload = {'email': 'test@test.com', 'password': 'testpass'}
+        create_user(**payload)
+        res = api_client.post(TOKEN_URL, payload)
+
+        assert res.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert res['Retry-After'] == '1'
+        assert 'token' not in res.data
@@ -1,8 +1,24 @@
-from rest_framework import generics, permissions, authentication
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+from authentication.authentication import SignedTokenAuthentication
+from authentication.tokens import ACCESS, REFRESH, TOKEN_TTLS, \
+    issue_token, legacy_token_expired, revoke_token, signed_tokens_enabled
+from user.serializers import UserSerializer, AuthTokenSerializer, \
+    RefreshTokenSerializer, RevokeTokenSerializer
+
+
+def signed_token_response(user):
+    """Return a response holding fresh signed tokens for a user"""
+    return Response({
+        'token': issue_token(user, ACCESS),
+        'refresh': issue_token(user, REFRESH),
+        'expires_in': TOKEN_TTLS[ACCESS],
+    })
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -15,12 +31,52 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        """Issue a signed token pair, or a legacy token"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        if signed_tokens_enabled():
+            return signed_token_response(user)
+
+        token, created = Token.objects.get_or_create(user=user)
+        if legacy_token_expired(token):
+            token.delete()
+            token = Token.objects.create(user=user)
+
+        return Response({'token': token.key})
+
+
+class RefreshTokenView(generics.GenericAPIView):
+    """Exchange a refresh token for a new signed token pair"""
+    serializer_class = RefreshTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_token(serializer.validated_data['claims'])
+
+        return signed_token_response(serializer.validated_data['user'])
+
+
+class RevokeTokenView(generics.GenericAPIView):
+    """Revoke a signed access or refresh token"""
+    serializer_class = RevokeTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_token(serializer.validated_data['claims'])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (SignedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        """Return the complete authenticated user"""
+        return get_user_model().objects.get(pk=self.request.user.pk)